@@ -0,0 +1,180 @@
+"""
+Compare raw-JSON annotation copy with SDK annotation objects on a synthetic video annotation.
+
+Usage (from the repository root, the supervisely package must be installed):
+
+    python -m benchmarks.annotation_copier_benchmark --frames 5000 --objects 200 --figures 20
+
+A video annotation JSON with `--objects` tracks and `--figures` rectangles on every frame is
+generated. Both ways build the same request bodies as `api.video.annotation.append` without
+sending them: SDK objects are deserialized with `VideoAnnotation.from_json` and serialized back,
+AnnotationCopier remaps IDs in the raw JSON. Time and peak Python memory of each are printed.
+"""
+
+import argparse
+import time
+import tracemalloc
+import uuid
+
+import supervisely as sly
+from supervisely import KeyIdMap
+
+from src.annotation_copier import AnnotationCopier
+
+CLASS_NAME = "car"
+TAG_NAME = "color"
+
+
+def generate_annotation(frames: int, objects: int, figures: int) -> dict:
+    objects_json = [
+        {
+            "id": idx + 1,
+            "key": uuid.uuid4().hex,
+            "classId": 1,
+            "classTitle": CLASS_NAME,
+            "tags": [{"id": idx + 1, "tagId": 1, "name": TAG_NAME, "value": "red"}],
+            "labelerLogin": "admin",
+            "createdAt": "2024-01-01T00:00:00.000Z",
+            "updatedAt": "2024-01-01T00:00:00.000Z",
+        }
+        for idx in range(objects)
+    ]
+    frames_json = []
+    figure_id = 0
+    for index in range(frames):
+        frame_figures = []
+        for idx in range(figures):
+            figure_id += 1
+            obj = objects_json[(index + idx) % objects]
+            left, top = idx * 10 + index % 7, idx * 5
+            frame_figures.append(
+                {
+                    "id": figure_id,
+                    "key": uuid.uuid4().hex,
+                    "objectId": obj["id"],
+                    "objectKey": obj["key"],
+                    "geometryType": "rectangle",
+                    "geometry": {"points": {"exterior": [[left, top], [left + 40, top + 30]]}},
+                    "labelerLogin": "admin",
+                    "createdAt": "2024-01-01T00:00:00.000Z",
+                    "updatedAt": "2024-01-01T00:00:00.000Z",
+                }
+            )
+        frames_json.append({"index": index, "figures": frame_figures})
+    return {
+        "size": {"height": 1080, "width": 1920},
+        "description": "",
+        "key": uuid.uuid4().hex,
+        "tags": [],
+        "objects": objects_json,
+        "frames": frames_json,
+        "framesCount": frames,
+    }
+
+
+class _Response:
+    def __init__(self, data):
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+class _Ids:
+    def __init__(self):
+        self.last = 0
+
+    def take(self, count: int) -> list:
+        self.last += count
+        return list(range(self.last - count + 1, self.last + 1))
+
+
+class _TagApi:
+    def __init__(self, ids: _Ids):
+        self._ids = ids
+
+    def get_name_to_id_map(self, project_id):
+        return {TAG_NAME: 1}
+
+    def _append_json(self, entity_id, tags_json):
+        return self._ids.take(len(tags_json))
+
+    def append_to_objects_json(self, entity_id, tags_json):
+        return self._ids.take(len(tags_json))
+
+
+class _FigureApi:
+    def __init__(self, ids: _Ids):
+        self._ids = ids
+
+    def create_bulk(self, figures_json, entity_id=None, dataset_id=None, batch_size=200):
+        return self._ids.take(len(figures_json))
+
+
+class OfflineApi:
+    """Answers the requests of AnnotationCopier without a server."""
+
+    def __init__(self):
+        ids = _Ids()
+        self._ids = ids
+        self.object_class = type("ObjectClassApi", (), {})()
+        self.object_class.get_name_to_id_map = lambda project_id: {CLASS_NAME: 1}
+        self.video = type("VideoApi", (), {})()
+        self.video.tag = _TagApi(ids)
+        self.video.figure = _FigureApi(ids)
+
+    def post(self, method, data):
+        ids = self._ids.take(len(data["annotationObjects"]))
+        return _Response([{"id": obj_id} for obj_id in ids])
+
+
+def copy_with_sdk(ann_json: dict, meta: sly.ProjectMeta):
+    # the same work as `api.video.annotation.append` does before sending requests
+    key_id_map = KeyIdMap()
+    ann = sly.VideoAnnotation.from_json(ann_json, meta, key_id_map)
+    append_key_id_map = KeyIdMap()
+    for obj, obj_id in zip(ann.objects, range(1, len(ann.objects) + 1)):
+        append_key_id_map.add_object(obj.key(), obj_id)
+    [tag.to_json() for tag in ann.tags]
+    [tag.to_json() for obj in ann.objects for tag in obj.tags]
+    [figure.to_json(append_key_id_map, save_meta=True) for figure in ann.figures]
+
+
+def copy_raw(ann_json: dict):
+    AnnotationCopier(OfflineApi(), dst_project_id=1).copy_video(ann_json, video_id=1, dataset_id=1)
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.monotonic()
+    func(*args)
+    duration = time.monotonic() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duration, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--frames", type=int, default=5000)
+    parser.add_argument("--objects", type=int, default=200)
+    parser.add_argument("--figures", type=int, default=20, help="figures on every frame")
+    args = parser.parse_args()
+
+    meta = sly.ProjectMeta(
+        obj_classes=sly.ObjClassCollection([sly.ObjClass(CLASS_NAME, sly.Rectangle)]),
+        tag_metas=sly.TagMetaCollection([sly.TagMeta(TAG_NAME, sly.TagValueType.ANY_STRING)]),
+    )
+    ann_json = generate_annotation(args.frames, args.objects, args.figures)
+    print(f"{args.frames} frames, {args.objects} objects, {args.frames * args.figures} figures")
+    print(f"{'':>8} {'time, s':>9} {'peak memory, MB':>16}")
+    for name, func, func_args in (
+        ("sdk", copy_with_sdk, (ann_json, meta)),
+        ("raw", copy_raw, (ann_json,)),
+    ):
+        duration, peak = measure(func, *func_args)
+        print(f"{name:>8} {duration:>9.2f} {peak / 1024**2:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Compare whole-video and segmented transcoding on synthetic videos generated with ffmpeg.
+
+Usage (from the repository root, ffmpeg and ffprobe must be installed):
+
+    python -m benchmarks.transcode_benchmark --durations 60 600 --segment-duration 60
+
+For every duration a test video (mpeg4 video, mp3 audio, constant frame rate) is generated,
+transcoded both ways to H.264/AAC, and the time and frame count of the results are printed.
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from src.transcode import TranscodeMode, count_video_frames, transcode, transcode_segmented
+
+
+def generate_video(path: str, duration: int, size: str, fps: int):
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-y",
+            "-f",
+            "lavfi",
+            "-i",
+            f"testsrc2=size={size}:rate={fps}",
+            "-f",
+            "lavfi",
+            "-i",
+            "sine=frequency=440:sample_rate=44100",
+            "-t",
+            str(duration),
+            "-c:v",
+            "mpeg4",
+            "-q:v",
+            "5",
+            "-g",
+            str(fps * 2),
+            "-c:a",
+            "libmp3lame",
+            path,
+        ],
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def measure(func, *args, **kwargs) -> float:
+    start = time.monotonic()
+    func(*args, **kwargs)
+    return time.monotonic() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--durations", type=int, nargs="+", default=[60, 600])
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--segment-duration", type=float, default=60)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="transcode_benchmark_")
+    try:
+        print(f"{'duration, s':>12} {'whole, s':>10} {'segmented, s':>13} {'speedup':>8} frames")
+        for duration in args.durations:
+            src_path = os.path.join(work_dir, f"src_{duration}.avi")
+            whole_path = os.path.join(work_dir, f"whole_{duration}.mp4")
+            segmented_path = os.path.join(work_dir, f"segmented_{duration}.mp4")
+            generate_video(src_path, duration, args.size, args.fps)
+
+            whole_time = measure(transcode, src_path, whole_path, mode=TranscodeMode.FULL)
+            segmented_time = measure(
+                transcode_segmented,
+                src_path,
+                segmented_path,
+                segment_duration=args.segment_duration,
+                workers=args.workers,
+            )
+            frames = [count_video_frames(p) for p in (src_path, whole_path, segmented_path)]
+            print(
+                f"{duration:>12} {whole_time:>10.1f} {segmented_time:>13.1f} "
+                f"{whole_time / segmented_time:>7.2f}x {'/'.join(map(str, frames))}"
+            )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
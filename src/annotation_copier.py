@@ -0,0 +1,313 @@
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import supervisely as sly
+from supervisely import batched
+from supervisely.api.module_api import ApiField
+
+OBJECTS_BATCH_SIZE = 1000
+FIGURES_BATCH_SIZE = 1000
+
+# fields of source tags and figures which are sent to the destination as is,
+# IDs of the source instance are replaced or dropped
+TAG_FIELDS = ("name", "value", "frameRange", "labelerLogin", "createdAt", "updatedAt")
+FIGURE_FIELDS = (ApiField.GEOMETRY_TYPE, ApiField.GEOMETRY)
+FIGURE_EXTRA_FIELDS = (
+    "trackId",
+    "priority",
+    "smartToolInput",
+    "labelerLogin",
+    "createdAt",
+    "updatedAt",
+)
+MASK_3D = "mask_3d"
+
+
+class UnsupportedAnnotation(Exception):
+    """Raw annotation JSON can not be copied as is, SDK annotation objects are used instead."""
+
+
+class AnnotationCopier:
+    """
+    Copy annotations to the destination project from raw source JSON.
+
+    Objects, tags and figures are not deserialized into SDK annotation objects: classes and tags
+    are mapped by name to the destination project and IDs of the source instance are replaced
+    with the created ones. The JSON is checked before anything is created, UnsupportedAnnotation
+    is raised if it can not be copied this way.
+
+    Requests are the same as in `api.<type>.annotation.append`. One copier is used for all items
+    of a project, name to ID maps of its classes and tags are requested once.
+    """
+
+    def __init__(self, dst_api: sly.Api, dst_project_id: int):
+        self._api = dst_api
+        self._project_id = dst_project_id
+        self._class_ids = None
+        self._tag_ids = None
+
+    @property
+    def class_ids(self) -> Dict[str, int]:
+        if self._class_ids is None:
+            self._class_ids = self._api.object_class.get_name_to_id_map(self._project_id)
+        return self._class_ids
+
+    @property
+    def tag_ids(self) -> Dict[str, int]:
+        if self._tag_ids is None:
+            self._tag_ids = self._api.video.tag.get_name_to_id_map(self._project_id)
+        return self._tag_ids
+
+    def _check_tags(self, tags_json: List[dict]):
+        for tag_json in tags_json:
+            if tag_json.get("name") not in self.tag_ids:
+                raise UnsupportedAnnotation(f"Tag '{tag_json.get('name')}' not found in project")
+
+    def _check_objects(self, objects_json: List[dict]) -> set:
+        """Check objects and return their source IDs and keys."""
+        src_objects = set()
+        for obj_json in objects_json:
+            if obj_json.get(ApiField.ID) is None and obj_json.get("key") is None:
+                raise UnsupportedAnnotation("Object has neither ID nor key")
+            if obj_json.get("classTitle") not in self.class_ids:
+                raise UnsupportedAnnotation(
+                    f"Class '{obj_json.get('classTitle')}' not found in project"
+                )
+            self._check_tags(obj_json.get("tags", []))
+            src_objects.update(
+                src_key
+                for src_key in (obj_json.get(ApiField.ID), obj_json.get("key"))
+                if src_key is not None
+            )
+        return src_objects
+
+    @staticmethod
+    def _check_figures(figures_json: List[dict], src_objects: set, geometry: bool = True):
+        for figure_json in figures_json:
+            if geometry and any(field not in figure_json for field in FIGURE_FIELDS):
+                raise UnsupportedAnnotation("Figure has no geometry")
+            if (
+                figure_json.get(ApiField.OBJECT_ID) not in src_objects
+                and figure_json.get("objectKey") not in src_objects
+            ):
+                raise UnsupportedAnnotation("Figure refers to an unknown object")
+
+    def _tag_to_json(self, tag_json: dict) -> dict:
+        data = {field: tag_json[field] for field in TAG_FIELDS if tag_json.get(field) is not None}
+        data[ApiField.TAG_ID] = self.tag_ids[tag_json["name"]]
+        return data
+
+    @staticmethod
+    def _get_object_id(data: dict, object_ids: Dict) -> Optional[int]:
+        """Destination object of a figure by source object ID or key."""
+        object_id = object_ids.get(data.get(ApiField.OBJECT_ID))
+        if object_id is None:
+            object_id = object_ids.get(data.get("objectKey"))
+        return object_id
+
+    def _figure_to_json(self, figure_json: dict, object_ids: Dict, meta: dict = None) -> dict:
+        data = {field: figure_json[field] for field in FIGURE_FIELDS}
+        for field in FIGURE_EXTRA_FIELDS:
+            if figure_json.get(field) is not None:
+                data[field] = figure_json[field]
+        data[ApiField.OBJECT_ID] = self._get_object_id(figure_json, object_ids)
+        if meta is not None:
+            data[ApiField.META] = meta
+        return data
+
+    def _append_entity_tags(self, tag_api, entity_id: int, tags_json: List[dict]):
+        tags_json = [self._tag_to_json(tag_json) for tag_json in tags_json]
+        for batch in batched(tags_json, OBJECTS_BATCH_SIZE):
+            tag_api._append_json(entity_id, batch)
+
+    def _create_objects(
+        self,
+        objects_json: List[dict],
+        dataset_id: int,
+        tag_api,
+        tags_entity_id: int,
+        entity_id: int = None,
+    ) -> Dict:
+        """
+        Create objects with their tags. Returns destination object IDs by source object ID and key.
+        Point cloud objects belong to the dataset, other objects also get `entity_id`.
+        """
+        object_ids = {}
+        tags_json = []
+        for batch in batched(objects_json, OBJECTS_BATCH_SIZE):
+            items = []
+            for obj_json in batch:
+                item = {ApiField.CLASS_ID: self.class_ids[obj_json["classTitle"]]}
+                if entity_id is not None:
+                    item[ApiField.ENTITY_ID] = entity_id
+                items.append(item)
+            response = self._api.post(
+                "annotation-objects.bulk.add",
+                {ApiField.DATASET_ID: dataset_id, ApiField.ANNOTATION_OBJECTS: items},
+            )
+            for obj_json, created in zip(batch, response.json()):
+                for src_key in (obj_json.get(ApiField.ID), obj_json.get("key")):
+                    if src_key is not None:
+                        object_ids[src_key] = created[ApiField.ID]
+                for tag_json in obj_json.get("tags", []):
+                    tag_data = self._tag_to_json(tag_json)
+                    tag_data[ApiField.OBJECT_ID] = created[ApiField.ID]
+                    tags_json.append(tag_data)
+        for batch in batched(tags_json, OBJECTS_BATCH_SIZE):
+            tag_api.append_to_objects_json(tags_entity_id, batch)
+        return object_ids
+
+    @staticmethod
+    def _create_figures(
+        figure_api, figures_json: Iterable[dict], entity_id: int = None, dataset_id: int = None
+    ) -> List[int]:
+        """Create figures from the iterable in batches, so it is never held in memory at once."""
+        figures_json = iter(figures_json)
+        figure_ids = []
+        while True:
+            batch = list(islice(figures_json, FIGURES_BATCH_SIZE))
+            if len(batch) == 0:
+                return figure_ids
+            figure_ids.extend(
+                figure_api.create_bulk(
+                    batch, entity_id=entity_id, dataset_id=dataset_id, batch_size=FIGURES_BATCH_SIZE
+                )
+            )
+
+    def copy_video(self, ann_json: dict, video_id: int, dataset_id: int):
+        """Copy the annotation of a video, see `api.video.annotation.append`."""
+        objects_json = ann_json.get("objects", [])
+        frames = ann_json.get("frames", [])
+        self._check_tags(ann_json.get("tags", []))
+        src_objects = self._check_objects(objects_json)
+        for frame in frames:
+            self._check_figures(frame.get("figures", []), src_objects)
+
+        self._append_entity_tags(self._api.video.tag, video_id, ann_json.get("tags", []))
+        object_ids = self._create_objects(
+            objects_json, dataset_id, self._api.video.tag, video_id, entity_id=video_id
+        )
+        figures_json = (
+            self._figure_to_json(figure, object_ids, meta={ApiField.FRAME: frame["index"]})
+            for frame in frames
+            for figure in frame.get("figures", [])
+        )
+        self._create_figures(self._api.video.figure, figures_json, entity_id=video_id)
+
+    def copy_volume(
+        self, ann_json: dict, volume_id: int, dataset_id: int
+    ) -> Tuple[List[int], List[int]]:
+        """
+        Copy the annotation of a volume, see `api.volume.annotation.append`.
+        Spatial figures are created empty, only Mask3D ones are supported. Returns source and
+        destination IDs of spatial figures, their geometries are copied separately.
+        """
+        objects_json = ann_json.get("objects", [])
+        planes = ann_json.get("planes", [])
+        spatial_figures = ann_json.get("spatialFigures", [])
+        self._check_tags(ann_json.get("tags", []))
+        src_objects = self._check_objects(objects_json)
+        for plane in planes:
+            for slice_json in plane.get("slices", []):
+                self._check_figures(slice_json.get("figures", []), src_objects)
+        self._check_figures(spatial_figures, src_objects, geometry=False)
+        for figure_json in spatial_figures:
+            if figure_json.get(ApiField.GEOMETRY_TYPE) != MASK_3D:
+                raise UnsupportedAnnotation(
+                    f"Spatial figure of type '{figure_json.get(ApiField.GEOMETRY_TYPE)}'"
+                )
+            if figure_json.get(ApiField.ID) is None:
+                raise UnsupportedAnnotation("Spatial figure has no ID")
+
+        self._append_entity_tags(self._api.volume.tag, volume_id, ann_json.get("tags", []))
+        object_ids = self._create_objects(
+            objects_json, dataset_id, self._api.volume.tag, volume_id, entity_id=volume_id
+        )
+        figures_json = (
+            self._figure_to_json(
+                figure,
+                object_ids,
+                meta={
+                    "sliceIndex": slice_json["index"],
+                    "planeName": plane["name"],
+                    "normal": plane["normal"],
+                },
+            )
+            for plane in planes
+            for slice_json in plane.get("slices", [])
+            for figure in slice_json.get("figures", [])
+        )
+        self._create_figures(self._api.volume.figure, figures_json, entity_id=volume_id)
+        empty_figures_json = (
+            {
+                ApiField.OBJECT_ID: self._get_object_id(figure, object_ids),
+                ApiField.GEOMETRY_TYPE: MASK_3D,
+                "tool": MASK_3D,
+                ApiField.ENTITY_ID: volume_id,
+            }
+            for figure in spatial_figures
+        )
+        dst_figure_ids = self._create_figures(
+            self._api.volume.figure, empty_figures_json, entity_id=volume_id
+        )
+        return [figure[ApiField.ID] for figure in spatial_figures], dst_figure_ids
+
+    def copy_pointcloud(self, ann_json: dict, pointcloud_id: int, dataset_id: int):
+        """Copy the annotation of a point cloud, see `api.pointcloud.annotation.append`."""
+        objects_json = ann_json.get("objects", [])
+        figures = ann_json.get("figures", [])
+        self._check_tags(ann_json.get("tags", []))
+        src_objects = self._check_objects(objects_json)
+        self._check_figures(figures, src_objects)
+
+        self._append_entity_tags(self._api.pointcloud.tag, pointcloud_id, ann_json.get("tags", []))
+        object_ids = self._create_objects(
+            objects_json, dataset_id, self._api.pointcloud.tag, pointcloud_id
+        )
+        figures_json = (self._figure_to_json(figure, object_ids) for figure in figures)
+        self._create_figures(self._api.pointcloud.figure, figures_json, entity_id=pointcloud_id)
+
+    def copy_episode(self, ann_json: dict, dst_dataset_id: int, frame_to_pointcloud_ids: Dict):
+        """
+        Copy the annotation of a point cloud episode (the whole dataset).
+
+        Figures are sent in batches of FIGURES_BATCH_SIZE while frames are walked through,
+        and processed frames are released from `ann_json`, so memory does not grow with the
+        number of figures. As in `api.pointcloud_episode.annotation.append`, figures of
+        unmapped frames are skipped, and nothing is created if no frame is mapped.
+        Episode tags are not supported, such annotations are copied with SDK objects.
+        """
+        objects_json = ann_json.get("objects", [])
+        frames = ann_json.get("frames", [])
+        if len(ann_json.get("tags", [])) > 0:
+            raise UnsupportedAnnotation("Episode tags are not copied from raw JSON")
+        src_objects = self._check_objects(objects_json)
+        # objects are created with the first mapped frame, as the SDK does
+        entity_id = None
+        for frame in frames:
+            pointcloud_id = frame_to_pointcloud_ids.get(frame["index"])
+            if pointcloud_id is None:
+                continue
+            self._check_figures(frame.get("figures", []), src_objects)
+            if entity_id is None and len(frame.get("figures", [])) > 0:
+                entity_id = pointcloud_id
+        if entity_id is None:
+            return
+
+        object_ids = self._create_objects(
+            objects_json, dst_dataset_id, self._api.pointcloud.tag, entity_id
+        )
+
+        def iter_figures() -> Iterator[dict]:
+            for idx, frame in enumerate(frames):
+                pointcloud_id = frame_to_pointcloud_ids.get(frame["index"])
+                if pointcloud_id is not None:
+                    for figure in frame.get("figures", []):
+                        data = self._figure_to_json(figure, object_ids)
+                        data[ApiField.ENTITY_ID] = pointcloud_id
+                        yield data
+                frames[idx] = None
+
+        self._create_figures(
+            self._api.pointcloud_episode.figure, iter_figures(), dataset_id=dst_dataset_id
+        )
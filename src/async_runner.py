@@ -0,0 +1,53 @@
+import asyncio
+import threading
+from typing import Coroutine, Optional
+
+import supervisely as sly
+
+import src.globals as g
+
+
+class AsyncRunner:
+    """
+    Event loop running forever in a dedicated daemon thread.
+
+    Sync code (app handlers, pipeline stages) submits coroutines with `run` and waits for
+    the result, so async SDK methods never touch the loop of the uvicorn server. The semaphore
+    is created inside the runner loop and limits the number of concurrent requests of all
+    submitted coroutines.
+    """
+
+    def __init__(self, concurrency: int):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run_loop, name="async-transfer-loop", daemon=True
+        )
+        self._thread.start()
+        self.semaphore: asyncio.Semaphore = self.run(self._create_semaphore(concurrency))
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    @staticmethod
+    async def _create_semaphore(concurrency: int) -> asyncio.Semaphore:
+        return asyncio.Semaphore(concurrency)
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None):
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        return future.result(timeout)
+
+
+_runner: AsyncRunner = None
+_runner_lock = threading.Lock()
+
+
+def get_async_runner() -> AsyncRunner:
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            sly.logger.debug(
+                "Starting async transfer loop", extra={"concurrency": g.async_concurrency}
+            )
+            _runner = AsyncRunner(g.async_concurrency)
+    return _runner
@@ -1,4 +1,6 @@
-from typing import List
+import threading
+import time
+from typing import List, Optional
 from supervisely import logger, Api
 from supervisely.api.module_api import ApiField
 from dataclasses import dataclass
@@ -46,4 +48,144 @@ class AutoRestartInfo:
                     logger.debug("Autorestart info is not set.")
         except Exception:
             logger.error("Autorestart info is not available.", exc_info=True)
-        return autorestart
\ No newline at end of file
+        return autorestart
+
+class SyncCheckpoint:
+    """
+    Progress of the running synchronization, saved to the task fields so that a restarted task
+    continues from the point where the previous one stopped.
+
+    Stored are source IDs of completed projects and datasets, of projects which were already
+    prepared in the destination (so REUPLOAD does not remove them again) and, for datasets in
+    progress, the ID of the last synchronized source item. Items are processed in ascending ID
+    order. Item progress is saved at most once per `save_interval` seconds, started and completed
+    datasets and projects are saved immediately.
+
+    Items after the last synchronized one of datasets which were in progress when the previous task
+    stopped are "interrupted": they could be uploaded without their annotation.
+    """
+
+    class Fields:
+        CHECKPOINT = "syncCheckpoint"
+        COMPLETED_PROJECTS = "completedProjects"
+        STARTED_PROJECTS = "startedProjects"
+        COMPLETED_DATASETS = "completedDatasets"
+        DATASETS_PROGRESS = "datasetsProgress"
+
+    def __init__(self, api: Api, task_id: int, data: dict = None, save_interval: float = 30):
+        data = data or {}
+        self._api = api
+        self._task_id = task_id
+        self._save_interval = save_interval
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._last_save = 0
+        self._version = 0
+        self._saved_version = 0
+        self.completed_projects = set(data.get(self.Fields.COMPLETED_PROJECTS, []))
+        self.started_projects = set(data.get(self.Fields.STARTED_PROJECTS, []))
+        self.completed_datasets = set(data.get(self.Fields.COMPLETED_DATASETS, []))
+        self.datasets_progress = {
+            int(dataset_id): item_id
+            for dataset_id, item_id in data.get(self.Fields.DATASETS_PROGRESS, {}).items()
+        }
+        self._interrupted_datasets = dict(self.datasets_progress)
+
+    @classmethod
+    def load(cls, api: Api, task_id: int) -> "SyncCheckpoint":
+        data = None
+        try:
+            response = api.task.get_fields(task_id, [cls.Fields.CHECKPOINT])
+            data = response.get(cls.Fields.CHECKPOINT, None)
+        except Exception:
+            logger.warning("Sync checkpoint is not available.", exc_info=True)
+        checkpoint = cls(api, task_id, data)
+        if data is not None:
+            logger.info(
+                "Resuming synchronization from checkpoint",
+                extra={
+                    "completed_projects": len(checkpoint.completed_projects),
+                    "completed_datasets": len(checkpoint.completed_datasets),
+                    "datasets_in_progress": len(checkpoint.datasets_progress),
+                },
+            )
+        return checkpoint
+
+    def to_json(self) -> dict:
+        return {
+            self.Fields.COMPLETED_PROJECTS: sorted(self.completed_projects),
+            self.Fields.STARTED_PROJECTS: sorted(self.started_projects),
+            self.Fields.COMPLETED_DATASETS: sorted(self.completed_datasets),
+            self.Fields.DATASETS_PROGRESS: {
+                str(dataset_id): item_id for dataset_id, item_id in self.datasets_progress.items()
+            },
+        }
+
+    def save(self):
+        with self._lock:
+            payload = self.to_json()
+            self._last_save = time.monotonic()
+            self._version += 1
+            version = self._version
+        with self._save_lock:
+            # a newer state could be saved by another thread while this one waited
+            if version < self._saved_version:
+                return
+            try:
+                self._api.task.set_fields(
+                    self._task_id,
+                    [{ApiField.FIELD: self.Fields.CHECKPOINT, ApiField.PAYLOAD: payload}],
+                )
+                self._saved_version = version
+            except Exception:
+                logger.warning("Failed to save sync checkpoint.", exc_info=True)
+
+    def is_project_completed(self, project_id: int) -> bool:
+        return project_id in self.completed_projects
+
+    def is_project_started(self, project_id: int) -> bool:
+        return project_id in self.started_projects
+
+    def is_dataset_completed(self, dataset_id: int) -> bool:
+        return dataset_id in self.completed_datasets
+
+    def get_last_item_id(self, dataset_id: int) -> Optional[int]:
+        return self.datasets_progress.get(dataset_id)
+
+    def is_dataset_interrupted(self, dataset_id: int) -> bool:
+        return dataset_id in self._interrupted_datasets
+
+    def is_item_interrupted(self, dataset_id: int, item_id: int) -> bool:
+        if dataset_id not in self._interrupted_datasets:
+            return False
+        last_id = self._interrupted_datasets[dataset_id]
+        return last_id is None or item_id > last_id
+
+    def project_started(self, project_id: int):
+        with self._lock:
+            self.started_projects.add(project_id)
+        self.save()
+
+    def project_completed(self, project_id: int):
+        with self._lock:
+            self.completed_projects.add(project_id)
+        self.save()
+
+    def dataset_started(self, dataset_id: int):
+        with self._lock:
+            self.datasets_progress.setdefault(dataset_id, None)
+        self.save()
+
+    def dataset_completed(self, dataset_id: int):
+        with self._lock:
+            self.completed_datasets.add(dataset_id)
+            self.datasets_progress.pop(dataset_id, None)
+        self.save()
+
+    def items_done(self, dataset_id: int, last_item_id: int):
+        """Mark all items of the dataset up to `last_item_id` (inclusive) as synchronized."""
+        with self._lock:
+            self.datasets_progress[dataset_id] = last_item_id
+            need_save = time.monotonic() - self._last_save >= self._save_interval
+        if need_save:
+            self.save()
@@ -0,0 +1,115 @@
+import threading
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+import requests
+import supervisely as sly
+
+
+def is_overload_error(error: Exception) -> bool:
+    """Check if the error means that the server is overloaded: timeouts and 5xx responses."""
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return True
+    response = getattr(error, "response", None)
+    status_code = getattr(response, "status_code", None)
+    return status_code is not None and status_code >= 500
+
+
+class AdaptiveBatcher:
+    """
+    Split items into batches which size follows the observed transfer performance.
+
+    A batch is closed when it reaches the current number of items or `max_batch_bytes` in total.
+    After every processed batch `report` is called with its size and duration:
+    the batch size grows while throughput keeps rising and shrinks when throughput drops or
+    the batch takes longer than `target_latency`. `report_error` halves the batch size,
+    it is called on timeouts and 5xx responses.
+
+    Reports come from pipeline threads while batches are produced,
+    so the state is guarded by a lock.
+    """
+
+    GROW_FACTOR = 1.5
+    SHRINK_FACTOR = 0.75
+    THROUGHPUT_TOLERANCE = 0.05
+
+    def __init__(
+        self,
+        items: Iterable[Any],
+        get_size: Callable[[Any], Optional[int]],
+        initial_batch_size: int = 50,
+        min_batch_size: int = 1,
+        max_batch_size: int = 1000,
+        max_batch_bytes: int = 256 * 1024 * 1024,
+        target_latency: float = 60.0,
+    ):
+        self._items = items
+        self._get_size = get_size
+        self._min_batch_size = min_batch_size
+        self._max_batch_size = max_batch_size
+        self._max_batch_bytes = max_batch_bytes
+        self._target_latency = target_latency
+        self._batch_size = float(max(min_batch_size, min(initial_batch_size, max_batch_size)))
+        self._last_throughput = None
+        self._lock = threading.Lock()
+
+    @property
+    def batch_size(self) -> int:
+        with self._lock:
+            return int(self._batch_size)
+
+    def __iter__(self) -> Iterator[List[Any]]:
+        batch = []
+        batch_bytes = 0
+        for item in self._items:
+            item_size = self._get_size(item) or 0
+            if len(batch) > 0 and batch_bytes + item_size > self._max_batch_bytes:
+                yield batch
+                batch, batch_bytes = [], 0
+            batch.append(item)
+            batch_bytes += item_size
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch, batch_bytes = [], 0
+        if len(batch) > 0:
+            yield batch
+
+    def _resize(self, factor: float):
+        new_size = self._batch_size * factor
+        self._batch_size = max(self._min_batch_size, min(new_size, self._max_batch_size))
+
+    def report(self, items_count: int, bytes_count: int, duration: float):
+        """Account a successfully processed batch."""
+        if items_count == 0 or duration <= 0:
+            return
+        with self._lock:
+            old_size = int(self._batch_size)
+            if duration > self._target_latency:
+                self._resize(self.SHRINK_FACTOR)
+                self._last_throughput = None
+            else:
+                # bytes per second when sizes are known, otherwise items per second
+                throughput = (bytes_count or items_count) / duration
+                if self._last_throughput is None:
+                    if items_count >= old_size:
+                        self._resize(self.GROW_FACTOR)
+                elif throughput > self._last_throughput * (1 + self.THROUGHPUT_TOLERANCE):
+                    self._resize(self.GROW_FACTOR)
+                elif throughput < self._last_throughput * (1 - self.THROUGHPUT_TOLERANCE):
+                    self._resize(self.SHRINK_FACTOR)
+                self._last_throughput = throughput
+            if int(self._batch_size) != old_size:
+                sly.logger.debug(
+                    f"Batch size changed: {old_size} -> {int(self._batch_size)}",
+                    extra={"duration": round(duration, 2), "items": items_count},
+                )
+
+    def report_error(self, error: Exception):
+        """Account a timeout or 5xx response."""
+        with self._lock:
+            old_size = int(self._batch_size)
+            self._resize(0.5)
+            self._last_throughput = None
+        sly.logger.warning(
+            f"Server is overloaded ({type(error).__name__}). "
+            f"Batch size reduced: {old_size} -> {self.batch_size}"
+        )
@@ -0,0 +1,105 @@
+import threading
+from typing import Dict, Optional, Tuple
+
+import supervisely as sly
+from supervisely import DatasetInfo, ProjectInfo, WorkspaceInfo
+
+
+class DestinationIndex:
+    """
+    In-memory index of workspaces, projects and datasets of the destination team.
+
+    The index is built with a few list requests instead of one `get_info_by_name` request
+    per entity.
+    Lookups are answered from memory, and created or removed entities must be registered with
+    `add_*` / `remove_project` to keep the index up to date.
+    """
+
+    def __init__(self, api: sly.Api, team_id: int):
+        self._api = api
+        self._team_id = team_id
+        self._lock = threading.Lock()
+        self._workspaces: Dict[str, WorkspaceInfo] = {}
+        self._projects: Dict[Tuple[int, str], ProjectInfo] = {}
+        self._datasets: Dict[int, Dict[Tuple[Optional[int], str], DatasetInfo]] = {}
+        self._build()
+
+    def _build(self):
+        team_filter = [{"field": "groupId", "operator": "=", "value": self._team_id}]
+        for workspace in self._api.workspace.get_list(self._team_id):
+            self._workspaces[workspace.name] = workspace
+        try:
+            projects = self._api.project.get_list_all(filters=team_filter, skip_exported=False)
+            projects = projects["entities"]
+        except Exception:
+            sly.logger.debug(
+                "Failed to list projects of the destination team. "
+                "Projects will be listed for every workspace separately.",
+                exc_info=True,
+            )
+            projects = [
+                project
+                for workspace in self._workspaces.values()
+                for project in self._api.project.get_list(workspace.id)
+            ]
+        for project in projects:
+            self._projects[(project.workspace_id, project.name)] = project
+        try:
+            datasets = self._api.dataset.get_list_all(filters=team_filter)["entities"]
+        except Exception:
+            sly.logger.debug(
+                "Failed to list datasets of the destination team. "
+                "Datasets will be listed for every project separately.",
+                exc_info=True,
+            )
+            datasets = []
+        for dataset in datasets:
+            project_datasets = self._datasets.setdefault(dataset.project_id, {})
+            project_datasets[(dataset.parent_id, dataset.name)] = dataset
+        sly.logger.info(
+            "Destination team index is built",
+            extra={
+                "workspaces": len(self._workspaces),
+                "projects": len(self._projects),
+                "datasets": len(datasets),
+            },
+        )
+
+    def get_workspace(self, name: str) -> Optional[WorkspaceInfo]:
+        with self._lock:
+            return self._workspaces.get(name)
+
+    def add_workspace(self, workspace: WorkspaceInfo):
+        with self._lock:
+            self._workspaces[workspace.name] = workspace
+
+    def get_project(self, workspace_id: int, name: str) -> Optional[ProjectInfo]:
+        with self._lock:
+            return self._projects.get((workspace_id, name))
+
+    def add_project(self, project: ProjectInfo):
+        with self._lock:
+            self._projects[(project.workspace_id, project.name)] = project
+            self._datasets[project.id] = {}
+
+    def remove_project(self, project: ProjectInfo):
+        with self._lock:
+            self._projects.pop((project.workspace_id, project.name), None)
+            self._datasets.pop(project.id, None)
+
+    def get_dataset(
+        self, project_id: int, name: str, parent_id: Optional[int] = None
+    ) -> Optional[DatasetInfo]:
+        with self._lock:
+            if project_id not in self._datasets:
+                # project was not covered by the team listing
+                self._datasets[project_id] = {
+                    (dataset.parent_id, dataset.name): dataset
+                    for dataset in self._api.dataset.get_list(project_id, recursive=True)
+                }
+            return self._datasets[project_id].get((parent_id, name))
+
+    def add_dataset(self, dataset: DatasetInfo):
+        with self._lock:
+            project_datasets = self._datasets.setdefault(dataset.project_id, {})
+            project_datasets[(dataset.parent_id, dataset.name)] = dataset
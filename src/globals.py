@@ -16,11 +16,98 @@ src_api: sly.Api = None
 team_id = sly.env.team_id()
 task_id = sly.env.task_id()
 
-boost_by_async = False  # placeholer for future use
+# download images on a dedicated asyncio loop, falls back to sync downloads per batch
+boost_by_async = os.environ.get("BOOST_BY_ASYNC", "true").lower() in ("1", "true", "yes")
+# max number of concurrent async requests
+async_concurrency = int(os.environ.get("ASYNC_CONCURRENCY", 10))
 src_team_id = None
 
 transcode_videos = False
 
 logs_tf_path = "/one-way-instance-sync/logs"
 
-autorestart = False
\ No newline at end of file
+autorestart = False
+
+# number of datasets of a project synchronized at the same time
+dataset_workers = int(os.environ.get("DATASET_WORKERS", 4))
+
+
+def _dataset_share(total: int) -> int:
+    # pools below work inside every dataset worker, so their defaults are budgets of the whole
+    # app divided between dataset workers; values set explicitly are used per dataset as is
+    return max(1, total // max(1, dataset_workers))
+
+
+# number of image batches being downloaded, uploaded and annotated at the same time
+images_batches_in_flight = int(os.environ.get("IMAGES_BATCHES_IN_FLIGHT", 3))
+
+# transfer images without storing them on disk if they are not larger than the threshold (bytes)
+in_memory_transfer = os.environ.get("IN_MEMORY_TRANSFER", "true").lower() in ("1", "true", "yes")
+in_memory_max_image_size = int(os.environ.get("IN_MEMORY_MAX_IMAGE_SIZE", 5 * 1024 * 1024))
+
+# limits for adaptive image batches: number of images and total size in bytes
+images_max_batch_size = int(os.environ.get("IMAGES_MAX_BATCH_SIZE", 1000))
+images_max_batch_bytes = int(
+    os.environ.get("IMAGES_MAX_BATCH_BYTES", _dataset_share(256 * 1024 * 1024))
+)
+
+# persistent manifest of synchronized entities
+# (src -> dst IDs, hashes, updated_at, annotation fingerprints)
+use_sync_manifest = os.environ.get("USE_SYNC_MANIFEST", "true").lower() in ("1", "true", "yes")
+manifest_dir = os.environ.get("SYNC_MANIFEST_DIR", "manifest")
+manifest_tf_dir = "/one-way-instance-sync/manifest"
+
+# in "check" scenario skip unchanged projects and datasets and list only source items updated
+# since the last sync. Disabled by default: projects and datasets are skipped by their own
+# updated_at and items count, which may not change when only annotations of items are edited
+incremental_sync = os.environ.get("INCREMENTAL_SYNC", "false").lower() in ("1", "true", "yes")
+
+# number of videos of a dataset transferred at the same time
+# and number of concurrent ffmpeg processes
+video_workers = int(os.environ.get("VIDEO_WORKERS", _dataset_share(4)))
+ffmpeg_workers = int(os.environ.get("FFMPEG_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+
+# number of volumes of a dataset transferred at the same time
+volume_workers = int(os.environ.get("VOLUME_WORKERS", _dataset_share(4)))
+
+# split full re-encode of long videos (seconds) into segments transcoded on all cores
+segmented_transcode = os.environ.get("SEGMENTED_TRANSCODE", "true").lower() in (
+    "1", "true", "yes"
+)
+transcode_segment_duration = float(os.environ.get("TRANSCODE_SEGMENT_DURATION", 60))
+transcode_segmented_min_duration = float(os.environ.get("TRANSCODE_SEGMENTED_MIN_DURATION", 600))
+
+# transcoded videos are cached by source hash,
+# least recently used ones are removed above the size limit (0 disables)
+transcode_cache_dir = os.environ.get("TRANSCODE_CACHE_DIR", "transcode_cache")
+transcode_cache_max_bytes = int(os.environ.get("TRANSCODE_CACHE_MAX_BYTES", 20 * 1024**3))
+
+# integrity check of videos downloaded by external links:
+# "probe" (headers), "sample" (a few frames) or "full" (all frames)
+video_validation = os.environ.get("VIDEO_VALIDATION", "probe").lower()
+
+# partial downloads of large media files,
+# continued by HTTP Range requests after failures and restarts
+partial_downloads_dir = os.environ.get("PARTIAL_DOWNLOADS_DIR", "partial_downloads")
+
+# mask geometries of volume spatial figures are transferred in memory,
+# the size of one download request is kept under the limit (bytes)
+volume_geometries_max_bytes = int(
+    os.environ.get("VOLUME_GEOMETRIES_MAX_BYTES", 256 * 1024 * 1024)
+)
+
+# number of point clouds (or episode frames) of a batch downloaded and uploaded at the same time
+# when they are not found on destination by hash
+pointcloud_workers = int(os.environ.get("POINTCLOUD_WORKERS", _dataset_share(4)))
+
+# number of related images of point clouds downloaded at the same time
+# when they are not found on destination by hash
+related_images_workers = int(os.environ.get("RELATED_IMAGES_WORKERS", _dataset_share(8)))
+
+# copy annotations of videos, volumes and point clouds from raw JSON with remapped IDs
+# instead of SDK annotation objects
+raw_annotations = os.environ.get("RAW_ANNOTATIONS", "true").lower() in ("1", "true", "yes")
+
+# memory usage of the app is logged after every dataset,
+# a warning is logged when it exceeds the limit (bytes, 0 - no warning)
+memory_warning_bytes = int(os.environ.get("MEMORY_WARNING_BYTES", 6 * 1024 * 1024 * 1024))
@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import namedtuple
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
+from urllib.parse import urlparse
+
+import supervisely as sly
+
+import src.globals as g
+
+ManifestItem = namedtuple(
+    "ManifestItem",
+    ["id", "name", "hash", "updated_at", "src_id", "ann_fingerprint", "meta_fingerprint"],
+)
+Watermark = namedtuple("Watermark", ["updated_at", "items_count", "watermark", "dst_id"])
+
+
+def get_ann_fingerprint(ann_json: dict) -> str:
+    """Short digest of an annotation JSON to detect annotation changes between syncs."""
+    data = json.dumps(ann_json, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.md5(data.encode("utf-8")).hexdigest()
+
+
+class SyncManifest:
+    """
+    Persistent SQLite record of synchronized entities of one source team.
+
+    Every workspace, project, dataset and item is stored with its source and destination IDs,
+    name, content hash, source `updated_at` and annotation fingerprint. Items are grouped by
+    the destination dataset, so a later run can take the state of the destination dataset
+    from the manifest instead of listing it.
+
+    Completed projects and datasets get a watermark: their own `updated_at` and items count
+    at the end of the sync and the latest `updated_at` of their items, together with the ID of
+    the destination they were synchronized to. The next sync in the "check" scenario skips them
+    if nothing has moved and otherwise lists only newer items.
+
+    The database is kept in `g.manifest_dir` and is copied to Team Files after every sync,
+    so it survives restarts of the app on another node.
+    """
+
+    class Type:
+        WORKSPACE = "workspace"
+        PROJECT = "project"
+        DATASET = "dataset"
+        # items are stored with the type of their project, e.g. "images" or "videos"
+
+    def __init__(self, path: str):
+        self.path = path
+        sly.fs.ensure_base_path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entities (
+                type TEXT NOT NULL,
+                src_id INTEGER NOT NULL,
+                dst_id INTEGER NOT NULL,
+                dst_parent_id INTEGER,
+                name TEXT,
+                hash TEXT,
+                updated_at TEXT,
+                ann_fingerprint TEXT,
+                synced_at TEXT,
+                meta_fingerprint TEXT,
+                PRIMARY KEY (type, src_id)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entities_parent ON entities (type, dst_parent_id)"
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS watermarks (
+                type TEXT NOT NULL,
+                src_id INTEGER NOT NULL,
+                updated_at TEXT,
+                items_count INTEGER,
+                watermark TEXT,
+                dst_id INTEGER,
+                PRIMARY KEY (type, src_id)
+            )
+            """
+        )
+        # manifests of older versions: their watermarks never match a destination
+        # and meta of their items is considered changed
+        self._add_column("watermarks", "dst_id", "INTEGER")
+        self._add_column("entities", "meta_fingerprint", "TEXT")
+        self._conn.commit()
+
+    def _add_column(self, table: str, column: str, column_type: str):
+        columns = [row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")]
+        if column not in columns:
+            self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+    @staticmethod
+    def get_file_name(src_server: str, src_team_id: int) -> str:
+        host = urlparse(src_server).netloc or src_server
+        host = re.sub(r"[^A-Za-z0-9_.-]", "_", host)
+        return f"{host}_team_{src_team_id}.db"
+
+    @classmethod
+    def open(cls, dst_api: sly.Api, src_server: str, src_team_id: int) -> "SyncManifest":
+        """Open the manifest of the source team, restoring it from Team Files if needed."""
+        name = cls.get_file_name(src_server, src_team_id)
+        local_path = os.path.join(g.manifest_dir, name)
+        remote_path = os.path.join(g.manifest_tf_dir, name)
+        if not sly.fs.file_exists(local_path):
+            try:
+                if dst_api.file.exists(g.team_id, remote_path):
+                    dst_api.file.download(g.team_id, remote_path, local_path)
+                    sly.logger.info(f"Sync manifest restored from Team Files: {remote_path}")
+            except Exception:
+                sly.logger.warning(
+                    "Failed to restore sync manifest from Team Files.", exc_info=True
+                )
+        return cls(local_path)
+
+    def save_to_team_files(self, dst_api: sly.Api):
+        remote_path = os.path.join(g.manifest_tf_dir, os.path.basename(self.path))
+        try:
+            with self._lock:
+                self._conn.execute("PRAGMA wal_checkpoint(FULL)")
+            if dst_api.file.exists(g.team_id, remote_path):
+                dst_api.file.remove(g.team_id, remote_path)
+            dst_api.file.upload(g.team_id, self.path, remote_path)
+        except Exception:
+            sly.logger.warning("Failed to save sync manifest to Team Files.", exc_info=True)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def record(
+        self,
+        type: str,
+        src_id: int,
+        dst_id: int,
+        dst_parent_id: int = None,
+        name: str = None,
+        hash: str = None,
+        updated_at: str = None,
+        ann_fingerprint: str = None,
+        meta_fingerprint: str = None,
+    ):
+        self.record_many(
+            type,
+            dst_parent_id,
+            [(src_id, dst_id, name, hash, updated_at, ann_fingerprint, meta_fingerprint)],
+        )
+
+    def record_many(self, type: str, dst_parent_id: Optional[int], rows: Iterable[tuple]):
+        """
+        Insert or update entities of one parent.
+        Every row is (src_id, dst_id, name, hash, updated_at, ann_fingerprint, meta_fingerprint).
+        Unknown fingerprints (None) do not overwrite the stored ones.
+        """
+        synced_at = datetime.now(timezone.utc).isoformat()
+        rows = [(type, *row[:2], dst_parent_id, *row[2:6], synced_at, row[6]) for row in rows]
+        if len(rows) == 0:
+            return
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT INTO entities (
+                    type, src_id, dst_id, dst_parent_id, name, hash, updated_at,
+                    ann_fingerprint, synced_at, meta_fingerprint
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (type, src_id) DO UPDATE SET
+                    dst_id = excluded.dst_id,
+                    dst_parent_id = excluded.dst_parent_id,
+                    name = excluded.name,
+                    hash = excluded.hash,
+                    updated_at = excluded.updated_at,
+                    ann_fingerprint = COALESCE(excluded.ann_fingerprint, entities.ann_fingerprint),
+                    synced_at = excluded.synced_at,
+                    meta_fingerprint = COALESCE(
+                        excluded.meta_fingerprint, entities.meta_fingerprint
+                    )
+                """,
+                rows,
+            )
+            self._conn.commit()
+
+    def get(self, type: str, src_id: int) -> Optional[ManifestItem]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT dst_id, name, hash, updated_at, src_id, ann_fingerprint, "
+                "meta_fingerprint "
+                "FROM entities WHERE type = ? AND src_id = ?",
+                (type, src_id),
+            ).fetchone()
+        return ManifestItem(*row) if row is not None else None
+
+    def get_children(self, type: str, dst_parent_id: int) -> List[ManifestItem]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT dst_id, name, hash, updated_at, src_id, ann_fingerprint, "
+                "meta_fingerprint "
+                "FROM entities WHERE type = ? AND dst_parent_id = ?",
+                (type, dst_parent_id),
+            ).fetchall()
+        return [ManifestItem(*row) for row in rows]
+
+    def get_watermark(self, type: str, src_id: int) -> Optional[Watermark]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT updated_at, items_count, watermark, dst_id FROM watermarks "
+                "WHERE type = ? AND src_id = ?",
+                (type, src_id),
+            ).fetchone()
+        return Watermark(*row) if row is not None else None
+
+    def set_watermark(
+        self,
+        type: str,
+        src_id: int,
+        updated_at: str,
+        items_count: int,
+        watermark: str = None,
+        dst_id: int = None,
+    ):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO watermarks "
+                "(type, src_id, updated_at, items_count, watermark, dst_id) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (type, src_id, updated_at, items_count, watermark, dst_id),
+            )
+            self._conn.commit()
@@ -0,0 +1,31 @@
+import resource
+import sys
+
+import psutil
+import supervisely as sly
+
+import src.globals as g
+
+
+def get_memory_usage() -> int:
+    """Resident memory of the app process (bytes)."""
+    return psutil.Process().memory_info().rss
+
+
+def get_peak_memory_usage() -> int:
+    """Peak resident memory of the app process since its start (bytes)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def log_memory_usage(message: str, debug: bool = False):
+    """Log current and peak memory of the process, warn when it exceeds g.memory_warning_bytes."""
+    usage, peak = get_memory_usage(), get_peak_memory_usage()
+    text = f"{message}. Memory usage: {usage / 1024**2:.0f} MB, peak: {peak / 1024**2:.0f} MB"
+    if 0 < g.memory_warning_bytes < usage:
+        sly.logger.warning(f"{text}, limit: {g.memory_warning_bytes / 1024**2:.0f} MB")
+    elif debug:
+        sly.logger.debug(text)
+    else:
+        sly.logger.info(text)
@@ -0,0 +1,91 @@
+import queue
+import threading
+from typing import Any, Callable, Iterable, List
+
+import supervisely as sly
+
+_STOP = object()
+_POLL_TIMEOUT = 0.5
+
+
+def run_pipeline(items: Iterable[Any], stages: List[Callable[[Any], Any]], max_in_flight: int = 2):
+    """
+    Run every item through the chain of stages so that different items occupy different stages
+    at the same time (e.g. item N+1 is downloaded while item N is uploaded).
+
+    Every stage works in its own thread and processes items in the original order.
+    The result of a stage is passed to the next one. At most `max_in_flight` items are
+    processed at once: the next item is taken from `items` only when the last stage is done
+    with one of the previous items. This keeps memory and disk usage bounded.
+
+    The first exception raised by a stage (or by the `items` iterator) stops the pipeline
+    and is re-raised in the calling thread.
+    """
+    if max_in_flight < 1:
+        raise ValueError(f"max_in_flight must be positive, got {max_in_flight}")
+
+    slots = threading.BoundedSemaphore(max_in_flight)
+    stop_event = threading.Event()
+    errors = []
+    queues = [queue.Queue() for _ in stages]
+
+    def _get(q: queue.Queue):
+        while not stop_event.is_set():
+            try:
+                return q.get(timeout=_POLL_TIMEOUT)
+            except queue.Empty:
+                continue
+        return _STOP
+
+    def _worker(stage: Callable, in_q: queue.Queue, out_q: queue.Queue):
+        try:
+            while True:
+                item = _get(in_q)
+                if item is _STOP:
+                    break
+                result = stage(item)
+                if out_q is not None:
+                    out_q.put(result)
+                else:
+                    slots.release()
+        except Exception as e:
+            errors.append(e)
+            stop_event.set()
+        finally:
+            if out_q is not None:
+                out_q.put(_STOP)
+
+    threads = []
+    for idx, stage in enumerate(stages):
+        out_q = queues[idx + 1] if idx + 1 < len(stages) else None
+        thread = threading.Thread(
+            target=_worker, args=(stage, queues[idx], out_q), daemon=True
+        )
+        thread.start()
+        threads.append(thread)
+
+    try:
+        items = iter(items)
+        while True:
+            # the slot is taken before the item, so no more than `max_in_flight` are held at once
+            while not slots.acquire(timeout=_POLL_TIMEOUT):
+                if stop_event.is_set():
+                    break
+            if stop_event.is_set():
+                break
+            item = next(items, _STOP)
+            if item is _STOP:
+                break
+            queues[0].put(item)
+    except Exception as e:
+        errors.append(e)
+        stop_event.set()
+    finally:
+        queues[0].put(_STOP)
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        if len(errors) > 1:
+            sly.logger.debug(f"Pipeline stopped with {len(errors)} errors, raising the first one.")
+        raise errors[0]
@@ -0,0 +1,168 @@
+import json
+import os
+import re
+import shutil
+import time
+from typing import Callable, Optional
+
+import requests
+import supervisely as sly
+
+import src.globals as g
+from src.batching import is_overload_error
+
+CHUNK_SIZE = 1024 * 1024
+# offset of the partial file is saved to the sidecar after every SAVE_EVERY bytes
+SAVE_EVERY = 64 * 1024 * 1024
+RETRIES = 10
+TIMEOUT = 60
+
+
+class DownloadMethod:
+    VIDEO = "videos.download"
+    VOLUME = "volumes.download"
+    POINTCLOUD = "point-clouds.download"  # point clouds and point cloud episodes
+
+
+def _read_sidecar(sidecar_path: str, key: str) -> int:
+    try:
+        with open(sidecar_path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return 0
+    if data.get("key") != key:
+        return 0
+    return int(data.get("offset", 0))
+
+
+def _write_sidecar(sidecar_path: str, key: str, offset: int, total: Optional[int]):
+    tmp_path = sidecar_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"key": key, "offset": offset, "total": total}, f)
+    os.replace(tmp_path, sidecar_path)
+
+
+def _parse_total(response: requests.Response, offset: int) -> Optional[int]:
+    content_range = response.headers.get("Content-Range")
+    if content_range is not None:
+        match = re.search(r"/(\d+)$", content_range)
+        if match is not None:
+            return int(match.group(1))
+    content_length = response.headers.get("Content-Length")
+    if content_length is not None:
+        return offset + int(content_length)
+    return None
+
+
+def download_url_resumable(
+    url: str,
+    path: str,
+    part_path: str,
+    key: str,
+    json_data: dict = None,
+    headers: dict = None,
+    progress_cb: Optional[Callable] = None,
+    retries: int = RETRIES,
+):
+    """
+    Download the file with POST requests, continuing after dropped connections with
+    HTTP Range requests.
+
+    Data is written to `part_path`, its valid length is saved to the `<part_path>.json` sidecar
+    together with `key`, so a retry or a restarted task continues the partial file of the same key.
+    If the server ignores the Range header, the download starts over. The finished file is
+    moved to `path`.
+    """
+    sidecar_path = part_path + ".json"
+    sly.fs.ensure_base_path(part_path)
+    offset = _read_sidecar(sidecar_path, key) if os.path.exists(part_path) else 0
+    offset = min(offset, os.path.getsize(part_path)) if offset > 0 else 0
+    if offset > 0:
+        sly.logger.info(f"Resuming download of {path} from {offset} bytes")
+        if progress_cb is not None:
+            progress_cb(offset)
+
+    total = None
+    for attempt in range(retries):
+        request_headers = dict(headers or {})
+        if offset > 0:
+            request_headers["Range"] = f"bytes={offset}-"
+        try:
+            with requests.post(
+                url, json=json_data, headers=request_headers, stream=True, timeout=TIMEOUT
+            ) as response:
+                if response.status_code == 416 and offset > 0:
+                    # nothing left to download
+                    total = _parse_total(response, offset)
+                    if total is None or total == offset:
+                        break
+                    offset = 0
+                    continue
+                response.raise_for_status()
+                if offset > 0 and response.status_code != 206:
+                    sly.logger.warning(
+                        f"Range requests are not supported for {url}, starting over."
+                    )
+                    offset = 0
+                total = _parse_total(response, offset)
+                with open(part_path, "r+b" if offset > 0 else "wb") as f:
+                    f.seek(offset)
+                    f.truncate()
+                    unsaved = 0
+                    try:
+                        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                            f.write(chunk)
+                            offset += len(chunk)
+                            unsaved += len(chunk)
+                            if progress_cb is not None:
+                                progress_cb(len(chunk))
+                            if unsaved >= SAVE_EVERY:
+                                f.flush()
+                                _write_sidecar(sidecar_path, key, offset, total)
+                                unsaved = 0
+                    finally:
+                        f.flush()
+                        _write_sidecar(sidecar_path, key, offset, total)
+            if total is None or offset >= total:
+                break
+            sly.logger.warning(f"Download of {path} stopped at {offset}/{total} bytes. Resuming...")
+        except requests.exceptions.RequestException as e:
+            interrupted = isinstance(e, requests.exceptions.ChunkedEncodingError)
+            if not (interrupted or is_overload_error(e)) or attempt == retries - 1:
+                raise
+            sly.logger.warning(
+                f"Download of {path} interrupted at {offset} bytes ({type(e).__name__}). "
+                f"Resuming... {attempt + 1}/{retries}"
+            )
+            time.sleep(min(2**attempt, 30))
+    else:
+        raise RuntimeError(f"Failed to download {path}: {offset}/{total} bytes received.")
+
+    sly.fs.ensure_base_path(path)
+    shutil.move(part_path, path)
+    sly.fs.silent_remove(sidecar_path)
+
+
+def download_resumable(
+    api: sly.Api,
+    method: str,
+    id: int,
+    path: str,
+    progress_cb: Optional[Callable] = None,
+):
+    """
+    Resumable replacement of `api.video.download_path` and similar methods.
+    Partial files are kept in `g.partial_downloads_dir`, so they outlive the scratch
+    directories of datasets and are continued after the task is restarted.
+    """
+    key = f"{api.server_address}|{method}|{id}"
+    part_name = f"{method.split('.')[0]}_{id}.part"
+    download_url_resumable(
+        url=api.api_server_address + "/v3/" + method,
+        path=path,
+        part_path=os.path.join(g.partial_downloads_dir, part_name),
+        key=key,
+        json_data={"id": id},
+        headers=api.headers,
+        progress_cb=progress_cb,
+    )
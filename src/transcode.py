@@ -0,0 +1,430 @@
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import List, Optional, Tuple
+
+import supervisely as sly
+
+# streams which are played by browsers as is in mp4 container
+BROWSER_VIDEO_CODECS = {"h264"}
+BROWSER_PIXEL_FORMATS = {"yuv420p", "yuvj420p"}
+BROWSER_AUDIO_CODECS = {"aac", "mp3"}
+
+DEFAULT_VIDEO_CODEC = "libx264"
+DEFAULT_AUDIO_CODEC = "aac"
+
+# allowed difference of packet timestamps and durations of the transcoded video (seconds)
+TIMESTAMP_TOLERANCE = 0.005
+
+
+class TranscodeMode:
+    COPY = "copy"  # remux streams to mp4 without re-encoding
+    AUDIO = "audio"  # copy video stream, re-encode audio
+    FULL = "full"  # re-encode video and audio
+
+
+def _run_ffmpeg(args: list, slots: Optional[threading.Semaphore] = None):
+    with slots if slots is not None else nullcontext():
+        pcs = subprocess.run(
+            args,
+            check=False,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+    if pcs.returncode != 0:
+        raise RuntimeError(pcs.stderr)
+    return pcs
+
+
+def probe_video(path: str) -> dict:
+    """Read streams and container info of the video with ffprobe."""
+    pcs = _run_ffmpeg(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-print_format",
+            "json",
+            "-show_streams",
+            "-show_format",
+            path,
+        ]
+    )
+    return json.loads(pcs.stdout)
+
+
+def get_transcode_mode(probe: Optional[dict]) -> str:
+    """
+    Choose the cheapest transcode mode which makes the video playable in browser.
+    Video is re-encoded if its codec or pixel format is not supported or its frame rate is
+    variable (constant frame rate keeps frame indices of annotations stable).
+    """
+    if probe is None:
+        return TranscodeMode.FULL
+    streams = probe.get("streams", [])
+    video_streams = [stream for stream in streams if stream.get("codec_type") == "video"]
+    audio_streams = [stream for stream in streams if stream.get("codec_type") == "audio"]
+    if len(video_streams) == 0:
+        return TranscodeMode.FULL
+    video = video_streams[0]
+    if video.get("codec_name") not in BROWSER_VIDEO_CODECS:
+        return TranscodeMode.FULL
+    if video.get("pix_fmt") not in BROWSER_PIXEL_FORMATS:
+        return TranscodeMode.FULL
+    if video.get("r_frame_rate") != video.get("avg_frame_rate"):
+        return TranscodeMode.FULL
+    if any(stream.get("codec_name") not in BROWSER_AUDIO_CODECS for stream in audio_streams):
+        return TranscodeMode.AUDIO
+    return TranscodeMode.COPY
+
+
+def count_video_frames(path: str) -> int:
+    """Count packets of the first video stream, the video is demuxed but not decoded."""
+    pcs = _run_ffmpeg(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-select_streams",
+            "v:0",
+            "-count_packets",
+            "-show_entries",
+            "stream=nb_read_packets",
+            "-of",
+            "csv=p=0",
+            path,
+        ]
+    )
+    return int(pcs.stdout.decode().strip().split(",")[0])
+
+
+def probe_video_packets(path: str) -> List[Tuple[float, Optional[float]]]:
+    """Timestamps and durations (seconds) of packets of the first video stream, in display order."""
+    pcs = _run_ffmpeg(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "packet=pts_time,duration_time",
+            "-of",
+            "csv=p=0",
+            path,
+        ]
+    )
+    packets = []
+    for line in pcs.stdout.decode().splitlines():
+        values = line.strip().split(",")
+        if len(values) < 2 or values[0] in ("", "N/A"):
+            continue
+        duration = float(values[1]) if values[1] not in ("", "N/A") else None
+        packets.append((float(values[0]), duration))
+    return sorted(packets)
+
+
+def check_video_timestamps(src_path: str, dst_path: str, tolerance: float = TIMESTAMP_TOLERANCE):
+    """
+    Compare frame count, timestamps (relative to the first frame) and frame durations of the
+    first video streams. RuntimeError is raised on mismatch.
+    """
+    src_packets, dst_packets = probe_video_packets(src_path), probe_video_packets(dst_path)
+    if len(src_packets) != len(dst_packets):
+        raise RuntimeError(
+            f"Frame count of the video changed: {len(src_packets)} -> {len(dst_packets)}"
+        )
+    if len(src_packets) == 0:
+        return
+    src_start, dst_start = src_packets[0][0], dst_packets[0][0]
+    for idx, ((src_pts, src_duration), (dst_pts, dst_duration)) in enumerate(
+        zip(src_packets, dst_packets)
+    ):
+        if abs((src_pts - src_start) - (dst_pts - dst_start)) > tolerance:
+            raise RuntimeError(
+                f"Timestamp of frame {idx} changed: {src_pts - src_start} -> {dst_pts - dst_start}"
+            )
+        if (
+            src_duration is not None
+            and dst_duration is not None
+            and abs(src_duration - dst_duration) > tolerance
+        ):
+            raise RuntimeError(
+                f"Duration of frame {idx} changed: {src_duration} -> {dst_duration}"
+            )
+
+
+def can_transcode_segmented(probe: Optional[dict], min_duration: float) -> bool:
+    """
+    Segments are transcoded independently, so only long videos with constant frame rate are
+    split: every frame is kept as is and the frame count does not depend on segment borders.
+    """
+    if probe is None:
+        return False
+    video_streams = [s for s in probe.get("streams", []) if s.get("codec_type") == "video"]
+    if len(video_streams) == 0:
+        return False
+    video = video_streams[0]
+    if video.get("r_frame_rate") != video.get("avg_frame_rate"):
+        return False
+    duration = float(probe.get("format", {}).get("duration") or 0)
+    return duration >= min_duration
+
+
+def transcode_segmented(
+    path: str,
+    output_path: str,
+    video_codec: str = DEFAULT_VIDEO_CODEC,
+    audio_codec: str = DEFAULT_AUDIO_CODEC,
+    segment_duration: float = 60,
+    workers: int = None,
+    has_audio: bool = True,
+    slots: Optional[threading.Semaphore] = None,
+) -> str:
+    """
+    Transcode a long video on all cores.
+
+    The video stream is split at keyframes without re-encoding, segments are encoded by parallel
+    ffmpeg processes (`workers`, all cores by default), and the results are concatenated with
+    stream copy together with the audio encoded in one more process. Frames are passed through
+    (`-vsync passthrough`), so frame count and timestamps of the source are kept. Frame count,
+    timestamps and durations of the result are verified and RuntimeError is raised on mismatch.
+    Every ffmpeg process takes one of `slots` if they are set, the semaphore may be shared
+    by transcodes of several videos.
+    """
+    workers = workers or os.cpu_count() or 1
+    # x264 threads of parallel processes share the cores
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    work_dir = tempfile.mkdtemp(prefix="transcode_", dir=os.path.dirname(output_path) or None)
+    try:
+        _run_ffmpeg(
+            [
+                "ffmpeg",
+                "-y",
+                "-i",
+                path,
+                "-map",
+                "0:v:0",
+                "-c",
+                "copy",
+                "-f",
+                "segment",
+                "-segment_time",
+                str(segment_duration),
+                "-reset_timestamps",
+                "1",
+                os.path.join(work_dir, "src_%05d.mkv"),
+            ],
+            slots,
+        )
+        segments = sorted(
+            os.path.join(work_dir, name) for name in os.listdir(work_dir) if name.startswith("src_")
+        )
+
+        def encode_segment(segment_path: str) -> str:
+            result_path = segment_path.replace("src_", "dst_").replace(".mkv", ".mp4")
+            _run_ffmpeg(
+                [
+                    "ffmpeg",
+                    "-y",
+                    "-i",
+                    segment_path,
+                    "-c:v",
+                    video_codec,
+                    "-pix_fmt",
+                    "yuv420p",
+                    "-threads",
+                    str(threads),
+                    "-vsync",
+                    "passthrough",
+                    result_path,
+                ],
+                slots,
+            )
+            return result_path
+
+        def encode_audio() -> str:
+            result_path = os.path.join(work_dir, "audio.m4a")
+            _run_ffmpeg(
+                ["ffmpeg", "-y", "-i", path, "-vn", "-c:a", audio_codec, result_path], slots
+            )
+            return result_path
+
+        # ffmpeg runs in its own process, threads here only wait for the processes
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            audio_future = executor.submit(encode_audio) if has_audio else None
+            encoded_segments: List[str] = list(executor.map(encode_segment, segments))
+            audio_path = audio_future.result() if audio_future is not None else None
+
+        list_path = os.path.join(work_dir, "segments.txt")
+        with open(list_path, "w") as f:
+            for segment_path in encoded_segments:
+                f.write(f"file '{os.path.abspath(segment_path)}'\n")
+        args = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", list_path]
+        if audio_path is not None:
+            args += ["-i", audio_path, "-map", "0:v", "-map", "1:a"]
+        args += ["-c", "copy", "-movflags", "+faststart", output_path]
+        _run_ffmpeg(args, slots)
+
+        check_video_timestamps(path, output_path)
+        sly.logger.debug(
+            f"Video {path} transcoded in {len(segments)} segments by {workers} processes"
+        )
+        return output_path
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def transcode(
+    path: str,
+    output_path: str,
+    video_codec: str = DEFAULT_VIDEO_CODEC,
+    audio_codec: str = DEFAULT_AUDIO_CODEC,
+    mode: str = None,
+    segmented: bool = False,
+    segment_duration: float = 60,
+    segmented_min_duration: float = 600,
+    segment_workers: int = None,
+    slots: Optional[threading.Semaphore] = None,
+) -> str:
+    """
+    Convert the video to mp4 playable in browser.
+    If `mode` is not set, the video is probed first and re-encoded only as much as needed
+    (see `get_transcode_mode`). With `segmented`, full re-encode of videos longer than
+    `segmented_min_duration` seconds is split between `segment_workers` processes
+    (see `transcode_segmented`). Every ffmpeg process takes one of `slots` if they are set.
+    """
+    probe = None
+    if mode is None or segmented:
+        try:
+            probe = probe_video(path)
+        except Exception:
+            sly.logger.warning(
+                f"Failed to probe video: {path}. Video will be re-encoded.", exc_info=True
+            )
+    if mode is None:
+        mode = get_transcode_mode(probe)
+    sly.logger.debug(f"Transcode mode for video {path}: {mode}")
+
+    if (
+        mode == TranscodeMode.FULL
+        and segmented
+        and can_transcode_segmented(probe, segmented_min_duration)
+    ):
+        has_audio = any(s.get("codec_type") == "audio" for s in probe.get("streams", []))
+        try:
+            return transcode_segmented(
+                path,
+                output_path,
+                video_codec,
+                audio_codec,
+                segment_duration=segment_duration,
+                workers=segment_workers,
+                has_audio=has_audio,
+                slots=slots,
+            )
+        except Exception:
+            sly.logger.warning(
+                f"Segmented transcode of video {path} failed. Transcoding it as a whole.",
+                exc_info=True,
+            )
+
+    args = ["ffmpeg", "-y", "-i", path]
+    if mode == TranscodeMode.COPY:
+        args += ["-c", "copy", "-sn", "-dn"]
+    elif mode == TranscodeMode.AUDIO:
+        args += ["-c:v", "copy", "-c:a", audio_codec, "-sn", "-dn"]
+    else:
+        args += ["-c:v", video_codec, "-c:a", audio_codec, "-vsync", "cfr"]
+    args += ["-movflags", "+faststart", output_path]
+    _run_ffmpeg(args, slots)
+    return output_path
+
+
+class TranscodeCache:
+    """
+    Local cache of transcoded videos keyed by the source video hash and transcode parameters.
+
+    Finished mp4 files are kept in `cache_dir` until their total size exceeds `max_bytes`,
+    then the least recently used ones are removed. Files are hard linked into and out of
+    the cache when possible, so taking a video from the cache does not copy it.
+    """
+
+    # change when transcoding produces different results for the same parameters
+    VERSION = 2
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        if self.enabled:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @classmethod
+    def get_key(cls, video_hash: str, **params) -> str:
+        data = json.dumps([cls.VERSION, video_hash, params], sort_keys=True)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.mp4")
+
+    @staticmethod
+    def _link_or_copy(src: str, dst: str):
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copyfile(src, dst)
+
+    def get(self, key: str, dst_path: str) -> bool:
+        """Put the cached video to `dst_path`. Returns False if the video is not cached."""
+        if not self.enabled:
+            return False
+        path = self._get_path(key)
+        with self._lock:
+            if not os.path.isfile(path):
+                return False
+            os.utime(path)  # mark as recently used
+            if os.path.exists(dst_path):
+                os.remove(dst_path)
+            self._link_or_copy(path, dst_path)
+        return True
+
+    def put(self, key: str, path: str):
+        if not self.enabled or os.path.getsize(path) > self.max_bytes:
+            return
+        cache_path = self._get_path(key)
+        tmp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+        try:
+            self._link_or_copy(path, tmp_path)
+            os.replace(tmp_path, cache_path)
+        except Exception:
+            sly.logger.warning(f"Failed to add video {path} to transcode cache.", exc_info=True)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            files = []
+            for entry in os.scandir(self.cache_dir):
+                if entry.is_file() and entry.name.endswith(".mp4"):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                os.remove(path)
+                total -= size
+                sly.logger.debug(f"Video removed from transcode cache: {path}")
@@ -1,10 +1,9 @@
 import anyio
 import os
 import time
-import asyncio
 import shutil
 from tqdm import tqdm
-from typing import List, Union, Optional
+from typing import Callable, Dict, List, Mapping, Tuple, Union, Optional
 import supervisely as sly
 from urllib.parse import urlparse
 from supervisely import batched, KeyIdMap, DatasetInfo
@@ -16,15 +15,57 @@ from supervisely.api.video.video_api import VideoInfo
 from supervisely.api.volume.volume_api import VolumeInfo
 from supervisely.api.pointcloud.pointcloud_api import PointcloudInfo
 from supervisely.io.fs import mkdir, silent_remove
-from src.globals import boost_by_async
+from supervisely._utils import get_bytes_hash
+from requests_toolbelt import MultipartEncoder
 import requests
 import subprocess
 import src.globals as g
 from PIL import Image
 from pathlib import Path
 import tempfile
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import io
+from collections import ChainMap, defaultdict
+from dataclasses import dataclass, field
+from src.pipeline import run_pipeline
+from src.async_runner import get_async_runner
+from src.batching import AdaptiveBatcher, is_overload_error
+from src.destination_index import DestinationIndex
+from src.manifest import ManifestItem, SyncManifest, Watermark, get_ann_fingerprint
+from src.autorestart import SyncCheckpoint
+from src.ranged_download import DownloadMethod, download_resumable
+from src.annotation_copier import AnnotationCopier, UnsupportedAnnotation
+from src.memory import log_memory_usage
+from src.transcode import (
+    DEFAULT_AUDIO_CODEC,
+    DEFAULT_VIDEO_CODEC,
+    TranscodeCache,
+    probe_video,
+    transcode,
+)
 
 BATCH_SIZE = 50
+HASH_CHECK_CHUNK_SIZE = 10000
+RELATED_IMAGES_BATCH_SIZE = 500
+# related images of less items are listed one by one instead of the whole dataset
+RELATED_IMAGES_LIST_THRESHOLD = 10
+OVERLOAD_RETRIES = 3
+
+# limits the number of ffmpeg processes run by all video workers
+_ffmpeg_slots = threading.BoundedSemaphore(g.ffmpeg_workers)
+_transcode_cache: TranscodeCache = None
+_transcode_cache_lock = threading.Lock()
+
+
+def get_transcode_cache() -> TranscodeCache:
+    """Created on first use, so the cache directory is not made if videos are not transcoded."""
+    global _transcode_cache
+    with _transcode_cache_lock:
+        if _transcode_cache is None:
+            _transcode_cache = TranscodeCache(g.transcode_cache_dir, g.transcode_cache_max_bytes)
+    return _transcode_cache
 
 
 class Scenario:
@@ -38,29 +79,6 @@ def change_link(bucket_path: str, link: str):
     parsed_url = urlparse(link)
     return f"{bucket_path}{parsed_url.path}"
 
-def _transcode(path: str, output_path: str, video_codec: str = "libx264", audio_codec: str = "aac"):    
-    pcs = subprocess.run(
-        [
-            "ffmpeg",
-            "-y",
-            "-i",
-            path,
-            "-c:v",
-            f"{video_codec}",
-            "-c:a",
-            f"{audio_codec}",
-            "-vsync",
-            "cfr",
-            output_path,
-        ],
-        check=False,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-    )
-    if pcs.returncode != 0:
-        raise RuntimeError(pcs.stderr)
-    return output_path
-
 def _log_skipped_video(api: sly.Api, video_info: VideoInfo):
     """
     Save the skipped file information as a file with the name which contains source information.
@@ -105,19 +123,58 @@ def download_image_external_link(link: str, path: str):
         raise e
 
 
-def download_video_external_link(link: str, path: str):
-    try:
-        response = requests.get(link)
-        with open(path, "wb") as fo:
-            fo.write(response.content)
+class VideoValidation:
+    PROBE = "probe"  # read container and stream headers
+    SAMPLE = "sample"  # decode a few frames across the video
+    FULL = "full"  # decode every frame
+
+
+VIDEO_VALIDATION_SAMPLES = 5
+DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
 
+
+def _validate_video(path: str, mode: str = VideoValidation.PROBE):
+    """Raise ValueError if the video file is corrupted. See VideoValidation for the modes."""
+    if mode == VideoValidation.FULL:
+        checks = [["ffmpeg", "-v", "error", "-i", path, "-f", "null", "-"]]
+    else:
+        try:
+            probe = probe_video(path)
+        except Exception:
+            raise ValueError(f"The video file '{path}' is corrupted.")
+        if not any(s.get("codec_type") == "video" for s in probe.get("streams", [])):
+            raise ValueError(f"The video file '{path}' has no video stream.")
+        if mode != VideoValidation.SAMPLE:
+            return
+        duration = float(probe.get("format", {}).get("duration") or 0)
+        positions = [
+            duration * idx / VIDEO_VALIDATION_SAMPLES for idx in range(VIDEO_VALIDATION_SAMPLES)
+        ]
+        checks = [
+            ["ffmpeg", "-v", "error", "-ss", str(pos), "-i", path]
+            + ["-frames:v", "1", "-f", "null", "-"]
+            for pos in positions
+        ]
+    for check in checks:
         result = subprocess.run(
-            ["ffmpeg", "-v", "error", "-i", path, "-f", "null", "-"],
+            check,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
         )
         if result.returncode != 0:
             raise ValueError(f"The video file '{path}' is corrupted.")
+
+
+def download_video_external_link(link: str, path: str):
+    try:
+        # the video is streamed to disk in chunks instead of being read into memory
+        with requests.get(link, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            with open(path, "wb") as fo:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    fo.write(chunk)
+
+        _validate_video(path, g.video_validation)
     except Exception as e:
         sly.logger.warning(f"Failed to download video from external link: {link}.")
         raise e
@@ -141,27 +198,231 @@ def retry_if_end_stream(func):
 
 
 def download_paths_async_or_sync(api: sly.Api, dataset_id: int, ids: List[int], paths: List[str]):
-    global boost_by_async
-    if boost_by_async:
+    """
+    Download images on the dedicated async loop if async transfer is enabled.
+    If the async download fails, only the current batch is downloaded synchronously.
+    """
+    if g.boost_by_async:
         try:
-            download_coro = api.image.download_paths_async(ids, paths)
-            loop = sly.utils.get_or_create_event_loop()
-            if loop.is_running():
-                future = asyncio.run_coroutine_threadsafe(download_coro, loop=loop)
-                future.result()
-            else:
-                loop.run_until_complete(download_coro)
+            runner = get_async_runner()
+            runner.run(api.image.download_paths_async(ids, paths, semaphore=runner.semaphore))
+            return
         except Exception as e:
             sly.logger.warning(
-                "Failed to download images asynchronously. Downloading images synchronously."
+                "Failed to download images asynchronously. Downloading images synchronously.",
+                exc_info=True,
+            )
+            for p in paths:
+                silent_remove(p)
+    api.image.download_paths(dataset_id, ids, paths)
+
+
+def download_bytes_async_or_sync(api: sly.Api, dataset_id: int, ids: List[int]) -> List[bytes]:
+    """Same as `download_paths_async_or_sync`, but keeps images in memory."""
+    if g.boost_by_async:
+        try:
+            runner = get_async_runner()
+            return runner.run(api.image.download_bytes_many_async(ids, semaphore=runner.semaphore))
+        except Exception as e:
+            sly.logger.warning(
+                "Failed to download images asynchronously. Downloading images synchronously.",
+                exc_info=True,
+            )
+    return api.image.download_bytes(dataset_id, ids)
+
+
+@dataclass
+class ImagesBatch:
+    """Batch of source images travelling through the download/upload/annotation stages."""
+
+    infos: List[ImageInfo]
+    paths: List[str]
+    pbar_correction: int = 0
+    downloaded_idx: List[int] = field(default_factory=list)
+    plan: Optional[dict] = None
+    images_bytes: dict = field(default_factory=dict)
+    dst_images: List[ImageInfo] = field(default_factory=list)
+    skipped: List[ImageInfo] = field(default_factory=list)
+    annotation_only: List[ImageInfo] = field(default_factory=list)
+    last_id: Optional[int] = None
+
+    @property
+    def ids(self) -> List[int]:
+        return [image.id for image in self.infos]
+
+    @property
+    def names(self) -> List[str]:
+        return [image.name for image in self.infos]
+
+    @property
+    def metas(self) -> List[dict]:
+        return [image.meta for image in self.infos]
+
+    @property
+    def hashs(self) -> List[str]:
+        return [image.hash for image in self.infos]
+
+    @property
+    def links(self) -> List[str]:
+        return [image.link for image in self.infos]
+
+
+class ImageChange:
+    NEW = "new"
+    UNCHANGED = "unchanged"
+    ANNOTATION = "annotation"  # pixels are the same, annotation or meta could change
+    MEDIA = "media"  # pixels have changed
+
+
+def classify_image_change(image: ImageInfo, existing_image, interrupted: bool = False) -> str:
+    """
+    Compare the source image with the destination one of the same name.
+    If a hash is unknown, pixels are considered changed and the image is uploaded again.
+    The annotation of an `interrupted` image (see `is_interrupted_item`) is always copied.
+    """
+    if existing_image is None:
+        return ImageChange.NEW
+    if image.updated_at <= existing_image.updated_at:
+        return ImageChange.ANNOTATION if interrupted else ImageChange.UNCHANGED
+    if image.hash is None or existing_image.hash is None or image.hash != existing_image.hash:
+        return ImageChange.MEDIA
+    return ImageChange.ANNOTATION
+
+
+def is_meta_changed(image: ImageInfo, existing_image) -> bool:
+    """
+    Compare meta of the source image with the destination one. Destination images taken from the
+    sync manifest have only the fingerprint of the meta recorded with them.
+    """
+    if isinstance(existing_image, ManifestItem):
+        return existing_image.meta_fingerprint != get_ann_fingerprint(image.meta or {})
+    return image.meta != existing_image.meta
+
+
+def get_existing_hashes(dst_api: sly.Api, hashes: List[str]) -> set:
+    """
+    Check which image hashes are already stored on the destination instance.
+    Hashes are checked in large chunks, so a whole dataset can be planned up front.
+    """
+    hashes = list(set(hash for hash in hashes if hash is not None))
+    existing_hashes = set()
+    for hashes_chunk in batched(hashes, HASH_CHECK_CHUNK_SIZE):
+        existing_hashes.update(dst_api.image.check_existing_hashes(hashes_chunk))
+    sly.logger.debug(
+        f"{len(existing_hashes)} of {len(hashes)} image hashes exist on destination instance."
+    )
+    return existing_hashes
+
+
+def plan_images_upload(
+    dst_api: sly.Api,
+    images_names: List[str],
+    images_hashs: List[str],
+    existing_images: dict,
+    existing_hashes: set = None,
+    images_sizes: List[int] = None,
+) -> dict:
+    """
+    Decide how every image of the batch gets to the destination dataset.
+    Returns indices of images grouped by method: "existing" (already in destination),
+    "hash" (linked by hash), "bytes" (transferred through memory) and "path"
+    (downloaded and uploaded as files).
+    If `existing_hashes` is not provided, hashes of the batch are checked here.
+    Images are transferred through memory only if `images_sizes` are known and
+    do not exceed g.in_memory_max_image_size.
+    """
+    plan = {"existing": [], "hash": [], "bytes": [], "path": []}
+    if all([name in existing_images for name in images_names]):
+        sly.logger.info("Current batch of images already exist in destination dataset. Skipping...")
+        plan["existing"] = list(range(len(images_names)))
+        return plan
+    if existing_hashes is None:
+        try:
+            existing_hashes = get_existing_hashes(dst_api, images_hashs)
+        except Exception:
+            sly.logger.info(
+                "Failed to check image hashes. Attempting to upload images with paths.",
+                exc_info=True,
             )
-            boost_by_async = False
-    if not boost_by_async:
-        api.image.download_paths(dataset_id, ids, paths)
+            existing_hashes = set()
+    for idx, (name, hash) in enumerate(zip(images_names, images_hashs)):
+        if name in existing_images:
+            plan["existing"].append(idx)
+        elif hash is not None and hash in existing_hashes:
+            plan["hash"].append(idx)
+        elif (
+            g.in_memory_transfer
+            and images_sizes is not None
+            and images_sizes[idx] is not None
+            and int(images_sizes[idx]) <= g.in_memory_max_image_size
+        ):
+            plan["bytes"].append(idx)
+        else:
+            plan["path"].append(idx)
+    if len(plan["bytes"]) + len(plan["path"]) > 0:
+        sly.logger.debug(
+            f"Images to link by hash: {len(plan['hash'])}, "
+            f"to transfer in memory: {len(plan['bytes'])}, to transfer with files: {len(plan['path'])}."
+        )
+    return plan
+
+
+@retry_if_end_stream
+def download_images(
+    src_api: sly.Api,
+    src_dataset: DatasetInfo,
+    images_ids: List[int],
+    images_paths: List[str],
+    plan: dict,
+    already_downloaded_idx: List[int] = None,
+) -> dict:
+    """
+    Download images of the "path" group to disk and images of the "bytes" group to memory.
+    Returns a dict mapping index of the image in the batch to its bytes.
+    """
+    images_bytes = {}
+    if len(plan["bytes"]) > 0:
+        data = download_bytes_async_or_sync(
+            src_api, src_dataset.id, [images_ids[idx] for idx in plan["bytes"]]
+        )
+        images_bytes = dict(zip(plan["bytes"], data))
+
+    already_downloaded_idx = set(already_downloaded_idx or [])
+    to_download = [idx for idx in plan["path"] if idx not in already_downloaded_idx]
+    if len(to_download) == 0:
+        if len(plan["path"]) > 0:
+            sly.logger.info("All images are already have been downloaded. Need just to upload.")
+        return images_bytes
+    filtered_ids = [images_ids[idx] for idx in to_download]
+    filtered_paths = [images_paths[idx] for idx in to_download]
+    for p in filtered_paths:
+        silent_remove(p)
+    download_paths_async_or_sync(src_api, src_dataset.id, filtered_ids, filtered_paths)
+    return images_bytes
+
+
+def upload_images_bytes(
+    dst_api: sly.Api,
+    dataset_id: int,
+    names: List[str],
+    images_bytes: List[bytes],
+    metas: List[dict],
+    conflict_resolution: str = None,
+) -> List[ImageInfo]:
+    """Upload images from memory buffers without writing them to disk."""
+    hashes = [get_bytes_hash(data) for data in images_bytes]
+    dst_api.image._upload_data_bulk(lambda data: io.BytesIO(data), zip(images_bytes, hashes))
+    return dst_api.image.upload_hashes(
+        dataset_id=dataset_id,
+        names=names,
+        hashes=hashes,
+        metas=metas,
+        conflict_resolution=conflict_resolution,
+    )
 
 
 @retry_if_end_stream
-def download_upload_images(
+def upload_images(
     src_api: sly.Api,
     dst_api: sly.Api,
     src_dataset: DatasetInfo,
@@ -171,104 +432,288 @@ def download_upload_images(
     images_names: List[str],
     images_metas: List[dict],
     images_hashs: List[str],
-    existing_images,
-    already_downloaded_idx: List[int] = None,
-):
-    # for p in images_paths:
-    #     silent_remove(p)
-
-    dst_images = []
-    if all([name in existing_images for name in images_names]):
-        sly.logger.info("Current batch of images already exist in destination dataset. Skipping...")
-        return [existing_images[name] for name in images_names]
-    elif any([name in existing_images for name in images_names]):
-        sly.logger.info(
-            "Some images in batch already exist in destination dataset. Downloading only missing images."
-        )
-        missing_images_ids = []
-        missing_images_paths = []
-        missing_images_names = []
-        missing_images_metas = []
-        for id, path, name, meta in zip(images_ids, images_paths, images_names, images_metas):
-            if name in existing_images:
-                img = existing_images[name]
-                dst_images.append(img)
-            else:
-                missing_images_ids.append(id)
-                missing_images_paths.append(path)
-                missing_images_names.append(name)
-                missing_images_metas.append(meta)
-        if missing_images_ids:
-            if already_downloaded_idx is not None and len(already_downloaded_idx) > 0:
-                filtered_ids = [
-                    id for i, id in enumerate(missing_images_ids) if i not in already_downloaded_idx
-                ]
-                filtered_paths = [
-                    path
-                    for i, path in enumerate(missing_images_paths)
-                    if i not in already_downloaded_idx
-                ]
-            else:
-                filtered_ids = missing_images_ids
-                filtered_paths = missing_images_paths
-            if len(filtered_ids) > 0:
-                for p in filtered_paths:
-                    silent_remove(p)
-                download_paths_async_or_sync(src_api, src_dataset.id, filtered_ids, filtered_paths)
-            else:
-                sly.logger.info("All images are already have been downloaded. Need just to upload.")
-            imgs = dst_api.image.upload_paths(
-                dataset_id=dst_dataset.id,
-                names=missing_images_names,
-                paths=missing_images_paths,
-                metas=missing_images_metas,
-            )
-            dst_images.extend(imgs)
-            for m_path in missing_images_paths:
-                silent_remove(m_path)
-        return dst_images
-    if all([hash is not None for hash in images_hashs]):
+    existing_images: dict,
+    plan: dict,
+    images_bytes: dict = None,
+    conflict_resolution: str = None,
+) -> List[ImageInfo]:
+    """
+    Upload images according to the plan made by `plan_images_upload`.
+    Returns destination infos in the same order as the source images of the batch.
+    Bytes of the "bytes" group are taken from `images_bytes` and released after upload.
+    Use `conflict_resolution="skip"` to retry a batch which could be partially uploaded.
+    """
+    dst_images = [None] * len(images_names)
+    for idx in plan["existing"]:
+        dst_images[idx] = existing_images[images_names[idx]]
+
+    def set_dst_images(indices: List[int], imgs: List[ImageInfo]):
+        # with "skip" conflict resolution already uploaded images are returned out of order,
+        # names are unique in the dataset, so infos are matched to the source images by name
+        imgs_by_name = {img.name: img for img in imgs}
+        for idx in indices:
+            dst_images[idx] = imgs_by_name[images_names[idx]]
+
+    if len(plan["hash"]) > 0:
         try:
-            sly.logger.info("Attempting to upload images by hash.")
-            valid_hashes = dst_api.image.check_existing_hashes(images_hashs)
-            if len(valid_hashes) != len(images_hashs):
-                raise Exception("Some hashes are not valid.")
-            dst_images = dst_api.image.upload_hashes(
+            imgs = dst_api.image.upload_hashes(
                 dataset_id=dst_dataset.id,
-                names=images_names,
-                hashes=images_hashs,
-                metas=images_metas,
+                names=[images_names[idx] for idx in plan["hash"]],
+                hashes=[images_hashs[idx] for idx in plan["hash"]],
+                metas=[images_metas[idx] for idx in plan["hash"]],
+                conflict_resolution=conflict_resolution,
             )
-            return dst_images
+            set_dst_images(plan["hash"], imgs)
         except Exception as e:
             sly.logger.info(
                 f"Failed uploading images by hash. Attempting to upload images with paths."
             )
-    if already_downloaded_idx is not None and len(already_downloaded_idx) > 0:
-        filtered_ids = [id for i, id in enumerate(images_ids) if i not in already_downloaded_idx]
-        filtered_paths = [
-            path for i, path in enumerate(images_paths) if i not in already_downloaded_idx
-        ]
-    else:
-        filtered_ids = images_ids
-        filtered_paths = images_paths
-    if len(filtered_ids) > 0:
-        for p in filtered_paths:
-            silent_remove(p)
-        download_paths_async_or_sync(src_api, src_dataset.id, filtered_ids, filtered_paths)
-    else:
-        sly.logger.info("All images are already have been downloaded. Need just to upload.")
-    dst_images = dst_api.image.upload_paths(
-        dataset_id=dst_dataset.id,
-        names=images_names,
-        paths=images_paths,
-        metas=images_metas,
-    )
+            plan["path"].extend(plan["hash"])
+            plan["hash"] = []
+
+    if len(plan["bytes"]) > 0:
+        if images_bytes is None:
+            images_bytes = {}
+        # bytes may be missing if the batch is retried
+        missing_idx = [idx for idx in plan["bytes"] if idx not in images_bytes]
+        if len(missing_idx) > 0:
+            data = download_bytes_async_or_sync(
+                src_api, src_dataset.id, [images_ids[idx] for idx in missing_idx]
+            )
+            images_bytes.update(zip(missing_idx, data))
+        imgs = upload_images_bytes(
+            dst_api,
+            dst_dataset.id,
+            [images_names[idx] for idx in plan["bytes"]],
+            [images_bytes[idx] for idx in plan["bytes"]],
+            [images_metas[idx] for idx in plan["bytes"]],
+            conflict_resolution,
+        )
+        set_dst_images(plan["bytes"], imgs)
+        images_bytes.clear()
+
+    if len(plan["path"]) > 0:
+        # files may be missing if the batch is retried or hash upload has failed
+        missing_idx = [idx for idx in plan["path"] if not sly.fs.file_exists(images_paths[idx])]
+        if len(missing_idx) > 0:
+            download_paths_async_or_sync(
+                src_api,
+                src_dataset.id,
+                [images_ids[idx] for idx in missing_idx],
+                [images_paths[idx] for idx in missing_idx],
+            )
+        imgs = dst_api.image.upload_paths(
+            dataset_id=dst_dataset.id,
+            names=[images_names[idx] for idx in plan["path"]],
+            paths=[images_paths[idx] for idx in plan["path"]],
+            metas=[images_metas[idx] for idx in plan["path"]],
+            conflict_resolution=conflict_resolution,
+        )
+        set_dst_images(plan["path"], imgs)
+
     for p in images_paths:
         silent_remove(p)
     return dst_images
 
 
+def download_images_by_links(
+    src_api: sly.Api,
+    images_names: List[str],
+    images_links: List[str],
+    links_idx: List[int],
+    storage_dir: str,
+) -> List[int]:
+    """Download images stored by links (cloud storage or external URLs), return their indices."""
+    successfully_downloaded = []
+    for idx in links_idx:
+        link = images_links[idx]
+        path = os.path.join(storage_dir, images_names[idx])
+        if src_api.remote_storage.is_bucket_url(link):
+            src_api.storage.download(g.src_team_id, link, path)
+        else:
+            download_image_external_link(link, path)
+        successfully_downloaded.append(idx)
+    return successfully_downloaded
+
+
+def upload_images_by_links(
+    dst_api: sly.Api,
+    dst_dataset: DatasetInfo,
+    batch: ImagesBatch,
+    existing_images: dict,
+    need_change_link: bool,
+    bucket_path: str,
+) -> Dict[str, ImageInfo]:
+    """
+    Upload images of the batch stored by links without downloading them (fast mode).
+    Images already existing in the destination dataset are not uploaded.
+    Returns uploaded images by name. If some links are not accessible, uploaded images are removed
+    and an exception is raised.
+    """
+    links_idx = [
+        idx
+        for idx, (name, link) in enumerate(zip(batch.names, batch.links))
+        if link is not None and name not in existing_images
+    ]
+    if len(links_idx) == 0:
+        return {}
+    links = [batch.links[idx] for idx in links_idx]
+    if need_change_link:
+        links = [change_link(bucket_path, link) for link in links]
+    uploaded = dst_api.image.upload_links(
+        dataset_id=dst_dataset.id,
+        names=[batch.names[idx] for idx in links_idx],
+        links=links,
+        metas=[batch.metas[idx] for idx in links_idx],
+        force_metadata_for_links=True,
+        skip_validation=False,
+    )
+    if any(image.width is None or image.height is None for image in uploaded):
+        dst_api.image.remove_batch(ids=[image.id for image in uploaded])
+        raise RuntimeError("Links are not accessible or invalid.")
+    return {image.name: image for image in uploaded}
+
+
+def get_existing_items(
+    manifest: Optional[SyncManifest],
+    item_type: str,
+    dst_dataset: DatasetInfo,
+    list_items: Callable[[int], list],
+) -> dict:
+    """
+    Items of the destination dataset by name.
+    The sync manifest is used if it covers every item of the dataset,
+    otherwise the destination dataset is listed with `list_items`.
+    """
+    if manifest is not None:
+        items = manifest.get_children(item_type, dst_dataset.id)
+        if len(items) == (dst_dataset.items_count or 0):
+            # an item removed and another one added keep the count, the added one has a newer ID
+            max_id = max((item.id for item in items), default=None)
+            newer_items = []
+            if max_id is not None:
+                newer_items = list_items(
+                    dst_dataset.id,
+                    filters=[{"field": ApiField.ID, "operator": ">", "value": max_id}],
+                )
+            if len(newer_items) == 0:
+                sly.logger.debug(
+                    f"State of destination dataset '{dst_dataset.name}' is taken from sync manifest."
+                )
+                return {item.name: item for item in items}
+    return {item.name: item for item in list_items(dst_dataset.id)}
+
+
+def skip_synchronized_items(
+    checkpoint: Optional[SyncCheckpoint], src_dataset: DatasetInfo, items: list
+) -> list:
+    """
+    Sort source items by ID and drop the ones synchronized before the task was restarted.
+    """
+    items = sorted(items, key=lambda item: item.id)
+    if checkpoint is None:
+        return items
+    last_id = checkpoint.get_last_item_id(src_dataset.id)
+    if last_id is None:
+        return items
+    remaining = [item for item in items if item.id > last_id]
+    sly.logger.info(
+        f"Resuming dataset '{src_dataset.name}': "
+        f"{len(items) - len(remaining)} items are already synchronized."
+    )
+    return remaining
+
+
+def is_interrupted_item(
+    checkpoint: Optional[SyncCheckpoint], src_dataset: DatasetInfo, item
+) -> bool:
+    """
+    The item could be uploaded by the stopped task before its annotation was copied,
+    so it is not skipped as synchronized even if the destination item is newer.
+    """
+    return checkpoint is not None and checkpoint.is_item_interrupted(src_dataset.id, item.id)
+
+
+class ItemsCheckpointer:
+    """
+    Save to the checkpoint the last item of the longest run of completed items.
+    Items completed out of order by parallel workers are saved only when all previous items are
+    completed too, so no item is lost after a restart. Used from one thread.
+    """
+
+    def __init__(
+        self, checkpoint: Optional[SyncCheckpoint], src_dataset: DatasetInfo, items: list
+    ):
+        self._checkpoint = checkpoint
+        self._dataset_id = src_dataset.id
+        self._ids = [item.id for item in items]
+        self._completed = set()
+        self._next_idx = 0
+
+    def done(self, item):
+        if self._checkpoint is None:
+            return
+        self._completed.add(item.id)
+        last_id = None
+        while self._next_idx < len(self._ids) and self._ids[self._next_idx] in self._completed:
+            last_id = self._ids[self._next_idx]
+            self._completed.discard(last_id)
+            self._next_idx += 1
+        if last_id is not None:
+            self._checkpoint.items_done(self._dataset_id, last_id)
+
+
+def get_updated_after_filters(updated_after: Optional[str]) -> Optional[List[dict]]:
+    """Server-side filter of source items updated after the watermark of the previous sync."""
+    if updated_after is None:
+        return None
+    return [{"field": ApiField.UPDATED_AT, "operator": ">", "value": updated_after}]
+
+
+def save_dataset_watermark(
+    manifest: Optional[SyncManifest],
+    src_dataset: DatasetInfo,
+    dst_dataset: DatasetInfo,
+    src_items: list,
+    updated_after: Optional[str] = None,
+):
+    """Remember the state of the synchronized source dataset for the next incremental sync."""
+    if manifest is None:
+        return
+    marks = [item.updated_at for item in src_items if item.updated_at is not None]
+    if updated_after is not None:
+        marks.append(updated_after)
+    manifest.set_watermark(
+        SyncManifest.Type.DATASET,
+        src_dataset.id,
+        src_dataset.updated_at,
+        src_dataset.items_count,
+        max(marks) if len(marks) > 0 else None,
+        dst_dataset.id,
+    )
+
+
+def get_dataset_watermark(
+    manifest: SyncManifest, src_dataset: DatasetInfo, dst_dataset: DatasetInfo
+) -> Optional[Watermark]:
+    """
+    Watermark of the previous sync of the source dataset into the same destination dataset.
+    Watermarks of destination datasets which were removed and created again are ignored.
+    """
+    watermark = manifest.get_watermark(SyncManifest.Type.DATASET, src_dataset.id)
+    if watermark is None or watermark.dst_id != dst_dataset.id:
+        return None
+    return watermark
+
+
+def is_dataset_unchanged(watermark: Optional[Watermark], src_dataset: DatasetInfo) -> bool:
+    return (
+        watermark is not None
+        and watermark.updated_at == src_dataset.updated_at
+        and watermark.items_count == src_dataset.items_count
+    )
+
+
 def process_images(
     dst_api: sly.Api,
     src_api: sly.Api,
@@ -281,163 +726,282 @@ def process_images(
     bucket_path: str = None,
     scenario: str = Scenario.NOT_SET,
     progress_download_item: Optional[Progress] = None,
+    storage_dir: str = "storage",
+    manifest: SyncManifest = None,
+    checkpoint: SyncCheckpoint = None,
+    updated_after: str = None,
 ):
-    storage_dir = "storage"
     mkdir(storage_dir, True)
-    src_images: List[ImageInfo] = src_api.image.get_list(src_dataset.id)
-    existing_images_list = dst_api.image.get_list(dst_dataset.id)
-    existing_images = {}
-    for img in existing_images_list:
-        existing_images[img.name] = img
+    src_images_list = src_api.image.get_list(
+        src_dataset.id, filters=get_updated_after_filters(updated_after)
+    )
+    src_images: List[ImageInfo] = skip_synchronized_items(checkpoint, src_dataset, src_images_list)
+    existing_images = get_existing_items(
+        manifest, ProjectType.IMAGES.value, dst_dataset, dst_api.image.get_list
+    )
 
-    with progress_items(
-        message=f"Synchronizing images for Dataset: {src_dataset.name}", total=len(src_images)
-    ) as pbar:
+    # Planning pass: check hashes of all images missing in the destination dataset at once,
+    # so every batch only transfers bytes of images that can not be linked by hash.
+    try:
+        existing_hashes = get_existing_hashes(
+            dst_api,
+            [
+                image.hash
+                for image in src_images
+                if classify_image_change(
+                    image,
+                    existing_images.get(image.name),
+                    is_interrupted_item(checkpoint, src_dataset, image),
+                )
+                in (ImageChange.NEW, ImageChange.MEDIA)
+            ],
+        )
+    except Exception:
+        sly.logger.warning(
+            "Failed to check image hashes on destination instance. "
+            "Hashes will be checked for every batch.",
+            exc_info=True,
+        )
+        existing_hashes = None
+
+    # Batch size adapts to image sizes and to the observed upload latency (see AdaptiveBatcher).
+    batcher = AdaptiveBatcher(
+        src_images,
+        get_size=lambda image: image.size,
+        initial_batch_size=BATCH_SIZE,
+        max_batch_size=g.images_max_batch_size,
+        max_batch_bytes=g.images_max_batch_bytes,
+    )
+
+    # Batches go through three stages running in parallel threads:
+    # download from source -> upload to destination -> copy annotations.
+    # Number of batches being processed at once is limited by g.images_batches_in_flight.
+    def download_batch(images_batch: List[ImageInfo]) -> ImagesBatch:
+        last_id = images_batch[-1].id
         pbar_correction = 0
-        for images_batch in batched(src_images, BATCH_SIZE):
-            if scenario == Scenario.CHECK:
-                images_batch_download = []
-                for image in images_batch:
-                    if image.name not in existing_images:
-                        images_batch_download.append(image)
-                    else:
-                        if image.updated_at > existing_images[image.name].updated_at:
-                            images_batch_download.append(image)
-                pbar_correction = len(images_batch) - len(images_batch_download)
-                images_batch = images_batch_download
-            images_ids = [image.id for image in images_batch]
-            images_names = [image.name for image in images_batch]
-            images_metas = [image.meta for image in images_batch]
-            images_paths = [os.path.join(storage_dir, image_name) for image_name in images_names]
-            images_hashs = [image.hash for image in images_batch]
-            images_links = [image.link for image in images_batch]
-            download_with_paths_idx = [idx for idx, link in enumerate(images_links) if link is None]
-            download_with_links_idx = [
-                idx for idx, link in enumerate(images_links) if link is not None
-            ]
-            images_links = [link for link in images_links if link is not None]
-            len_images_links = sum(1 for item in images_links if item is not None)
-
-            if is_fast_mode and need_change_link:
-                images_links = [change_link(bucket_path, link) for link in images_links]
-
-            dst_uploaded_images = []
-            if is_fast_mode:
-                try:
-                    if len_images_links > 0:
-                        images_names_updated = [images_names[i] for i in download_with_links_idx]
-                        images_metas_updated = [images_metas[i] for i in download_with_links_idx]
-                        dst_uploaded_images.extend(
-                            dst_api.image.upload_links(
-                                dataset_id=dst_dataset.id,
-                                names=images_names_updated,
-                                links=images_links,
-                                metas=images_metas_updated,
-                                force_metadata_for_links=True,
-                                skip_validation=False,
-                            )
-                        )
+        skipped = []
+        annotation_only = []
+        if scenario == Scenario.CHECK:
+            images_batch_download = []
+            changed_media = []
+            for image in images_batch:
+                change = classify_image_change(
+                    image,
+                    existing_images.get(image.name),
+                    is_interrupted_item(checkpoint, src_dataset, image),
+                )
+                if change == ImageChange.UNCHANGED:
+                    skipped.append(image)
+                    continue
+                images_batch_download.append(image)
+                if change == ImageChange.ANNOTATION:
+                    # stays in existing_images: only annotation and meta are uploaded
+                    annotation_only.append(image)
+                elif change == ImageChange.MEDIA:
+                    changed_media.append(image)
+            if len(changed_media) > 0:
+                # destination images with outdated pixels are removed and transferred again
+                dst_api.image.remove_batch(
+                    [existing_images[image.name].id for image in changed_media]
+                )
+                for image in changed_media:
+                    existing_images.pop(image.name)
+            pbar_correction = len(images_batch) - len(images_batch_download)
+            images_batch = images_batch_download
+        batch = ImagesBatch(
+            infos=images_batch,
+            paths=[os.path.join(storage_dir, image.name) for image in images_batch],
+            pbar_correction=pbar_correction,
+            skipped=skipped,
+            annotation_only=annotation_only,
+            last_id=last_id,
+        )
+        if is_fast_mode or len(batch.infos) == 0:
+            # links are tried first in fast mode, files are downloaded only if they fail
+            return batch
+        plan_and_download(batch, existing_images)
+        return batch
+
+    def plan_and_download(batch: ImagesBatch, existing: Mapping[str, ImageInfo]):
+        links = batch.links
+        # images stored by links are downloaded to disk, so they are never planned for memory
+        sizes = [image.size if link is None else None for image, link in zip(batch.infos, links)]
+        batch.plan = plan_images_upload(
+            dst_api, batch.names, batch.hashs, existing, existing_hashes, sizes
+        )
+        links_idx = [idx for idx in batch.plan["path"] if links[idx] is not None]
+        batch.downloaded_idx = download_images_by_links(
+            src_api, batch.names, links, links_idx, storage_dir
+        )
+        batch.images_bytes = download_images(
+            src_api, src_dataset, batch.ids, batch.paths, batch.plan, batch.downloaded_idx
+        )
 
-                        success = True
-                        for image in dst_uploaded_images:
-                            if image.width is None or image.height is None:
-                                success = False
-                                break
-                        if success is False:
-                            dst_api.image.remove_batch(
-                                ids=[image.id for image in dst_uploaded_images]
-                            )
-                            sly.logger.warning(
-                                "Links are not accessible or invalid. Attempting to download images with paths"
-                            )
-                            raise Exception(
-                                "Links are not accessible or invalid. Attempting to download images with paths"
-                            )
-                    if len(download_with_paths_idx) > 0:
-                        images_ids_updated = [images_ids[i] for i in download_with_paths_idx]
-                        images_names_updated = [images_names[i] for i in download_with_paths_idx]
-                        images_metas_updated = [images_metas[i] for i in download_with_paths_idx]
-                        images_paths_updated = [images_paths[i] for i in download_with_paths_idx]
-                        images_hashs_updated = [images_hashs[i] for i in download_with_paths_idx]
-
-                        dst_uploaded_images.extend(
-                            download_upload_images(
-                                src_api,
-                                dst_api,
-                                src_dataset,
-                                dst_dataset,
-                                images_ids_updated,
-                                images_paths_updated,
-                                images_names_updated,
-                                images_metas_updated,
-                                images_hashs_updated,
-                                existing_images,
-                            )
-                        )
-                except Exception:
-                    sly.logger.warning(
-                        "Failed to upload images by links. Attempting to download images with paths."
-                    )
-                    successfully_downloaded = []
-                    if len_images_links > 0:
-                        for idx, link in zip(download_with_links_idx, images_links):
-                            name = images_names[idx]
-                            path = os.path.join(storage_dir, name)
-                            if src_api.remote_storage.is_bucket_url(link):
-                                src_api.storage.download(g.src_team_id, link, path)
-                            else:
-                                download_image_external_link(link, path)
-                            successfully_downloaded.append(idx)
-
-                    dst_uploaded_images = download_upload_images(
-                        src_api,
-                        dst_api,
-                        src_dataset,
-                        dst_dataset,
-                        images_ids,
-                        images_paths,
-                        images_names,
-                        images_metas,
-                        images_hashs,
-                        existing_images,
-                        successfully_downloaded,
-                    )
-            else:
-                successfully_downloaded = []
-                if len_images_links > 0:
-                    for idx, link in zip(download_with_links_idx, images_links):
-                        name = images_names[idx]
-                        path = os.path.join(storage_dir, name)
-                        if src_api.remote_storage.is_bucket_url(link):
-                            src_api.storage.download(g.src_team_id, link, path)
-                        else:
-                            download_image_external_link(link, path)
-                        successfully_downloaded.append(idx)
-
-                dst_uploaded_images = download_upload_images(
+    def link_and_download(batch: ImagesBatch) -> Mapping[str, ImageInfo]:
+        """
+        Fast mode: upload images stored by links, then the rest of the batch is planned and
+        downloaded as in normal mode. Returns existing images together with the linked ones.
+        """
+        linked = {}
+        try:
+            linked = upload_images_by_links(
+                dst_api, dst_dataset, batch, existing_images, need_change_link, bucket_path
+            )
+        except Exception:
+            sly.logger.warning(
+                "Failed to upload images by links. Attempting to download images with paths.",
+                exc_info=True,
+            )
+        existing = ChainMap(linked, existing_images)
+        plan_and_download(batch, existing)
+        return existing
+
+    def upload_batch(batch: ImagesBatch) -> ImagesBatch:
+        if len(batch.infos) == 0:
+            return batch
+        existing = existing_images
+        if is_fast_mode:
+            existing = link_and_download(batch)
+        batch_bytes = sum(image.size or 0 for image in batch.infos)
+        conflict_resolution = None
+        for attempt in range(OVERLOAD_RETRIES):
+            start = time.monotonic()
+            try:
+                batch.dst_images = upload_images(
                     src_api,
                     dst_api,
                     src_dataset,
                     dst_dataset,
-                    images_ids,
-                    images_paths,
-                    images_names,
-                    images_metas,
-                    images_hashs,
-                    existing_images,
-                    successfully_downloaded,
+                    batch.ids,
+                    batch.paths,
+                    batch.names,
+                    batch.metas,
+                    batch.hashs,
+                    existing,
+                    batch.plan,
+                    batch.images_bytes,
+                    conflict_resolution,
                 )
+            except Exception as e:
+                if not is_overload_error(e) or attempt == OVERLOAD_RETRIES - 1:
+                    raise
+                batcher.report_error(e)
+                # part of the batch may be already uploaded, keep it instead of failing on names
+                conflict_resolution = "skip"
+                time.sleep(2 ** (attempt + 1))
+                continue
+            batcher.report(len(batch.infos), batch_bytes, time.monotonic() - start)
+            return batch
 
-            dst_images_ids = [image.id for image in dst_uploaded_images]
+    with progress_items(
+        message=f"Synchronizing images for Dataset: {src_dataset.name}", total=len(src_images)
+    ) as pbar:
 
+        def copy_annotations(batch: ImagesBatch) -> ImagesBatch:
+            dst_images_ids = [image.id for image in batch.dst_images]
+            annotations = []
             if len(dst_images_ids) > 0:
                 annotations = src_api.annotation.download_json_batch(
                     dataset_id=src_dataset.id,
-                    image_ids=images_ids,
+                    image_ids=batch.ids,
                     force_metadata_for_links=False,
                 )
                 dst_api.annotation.upload_jsons(img_ids=dst_images_ids, ann_jsons=annotations)
-            pbar.update(len(images_batch) + pbar_correction)
+            annotation_only_ids = set(image.id for image in batch.annotation_only)
+            for src, dst in zip(batch.infos, batch.dst_images):
+                if src.id in annotation_only_ids and src.meta and is_meta_changed(src, dst):
+                    dst_api.image.update_meta(dst.id, src.meta)
+            if manifest is not None:
+                # annotations of the destination images are up to date with the source
+                rows = [
+                    (
+                        src.id,
+                        dst.id,
+                        dst.name,
+                        src.hash,
+                        max(src.updated_at, dst.updated_at),
+                        get_ann_fingerprint(ann),
+                        get_ann_fingerprint(src.meta or {}),
+                    )
+                    for src, dst, ann in zip(batch.infos, batch.dst_images, annotations)
+                ]
+                for src in batch.skipped:
+                    dst = existing_images[src.name]
+                    rows.append((src.id, dst.id, dst.name, src.hash, dst.updated_at, None, None))
+                manifest.record_many(ProjectType.IMAGES.value, dst_dataset.id, rows)
+            if checkpoint is not None:
+                checkpoint.items_done(src_dataset.id, batch.last_id)
+            pbar.update(len(batch.infos) + batch.pbar_correction)
+            return batch
+
+        run_pipeline(
+            batcher,
+            [download_batch, upload_batch, copy_annotations],
+            max_in_flight=g.images_batches_in_flight,
+        )
+    save_dataset_watermark(manifest, src_dataset, dst_dataset, src_images_list, updated_after)
+
+
+def copy_raw_annotation(copy_raw: Callable, item_name: str) -> bool:
+    """
+    Copy the annotation from raw JSON with AnnotationCopier.
+    Returns False if raw annotations are disabled or the annotation is not supported by the
+    copier, then it has to be copied with SDK annotation objects.
+    """
+    if not g.raw_annotations:
+        return False
+    try:
+        copy_raw()
+    except UnsupportedAnnotation as e:
+        sly.logger.info(f"Annotation of '{item_name}' is copied with SDK objects: {e}")
+        return False
+    return True
+
+
+def append_video_annotation(
+    api: sly.Api,
+    copier: AnnotationCopier,
+    ann_json: dict,
+    meta: sly.ProjectMeta,
+    video_id: int,
+    dataset_id: int,
+    item_name: str,
+):
+    copied = copy_raw_annotation(
+        lambda: copier.copy_video(ann_json, video_id, dataset_id), item_name
+    )
+    if not copied:
+        key_id_map = KeyIdMap()
+        ann = sly.VideoAnnotation.from_json(
+            data=ann_json, project_meta=meta, key_id_map=key_id_map
+        )
+        api.video.annotation.append(video_id=video_id, ann=ann, key_id_map=key_id_map)
+
+
+def replace_video_annotation(
+    api: sly.Api,
+    copier: AnnotationCopier,
+    ann_json: dict,
+    meta: sly.ProjectMeta,
+    video_id: int,
+    dataset_id: int,
+    item_name: str,
+):
+    """Remove figures, objects and tags of the uploaded video and append the new annotation."""
+    current = api.video.annotation.download(video_id)
+    figure_ids = [
+        figure[ApiField.ID]
+        for frame in current.get("frames", [])
+        for figure in frame.get("figures", [])
+    ]
+    if len(figure_ids) > 0:
+        api.video.figure.remove_batch(figure_ids)
+    object_ids = [obj[ApiField.ID] for obj in current.get("objects", [])]
+    if len(object_ids) > 0:
+        api.video.object.remove_batch(object_ids)
+    for tag in current.get("tags", []):
+        api.video.tag.remove_from_video(tag[ApiField.ID])
+    append_video_annotation(api, copier, ann_json, meta, video_id, dataset_id, item_name)
 
 
 def process_videos(
@@ -452,137 +1016,339 @@ def process_videos(
     bucket_path: str = None,
     scenario: str = Scenario.NOT_SET,
     progress_download_item: Optional[Progress] = None,
+    storage_dir: str = "storage",
+    manifest: SyncManifest = None,
+    checkpoint: SyncCheckpoint = None,
+    updated_after: str = None,
 ):
-    storage_dir = "storage"
     mkdir(storage_dir, True)
-    key_id_map = KeyIdMap()
-    src_videos: List[VideoInfo] = src_api.video.get_list(
-        dataset_id=src_dataset.id, raw_video_meta=True
+    src_videos_list = src_api.video.get_list(
+        dataset_id=src_dataset.id,
+        filters=get_updated_after_filters(updated_after),
+        raw_video_meta=True,
     )
+    src_videos: List[VideoInfo] = skip_synchronized_items(checkpoint, src_dataset, src_videos_list)
+    # skipped videos must be retried by the next sync, so the dataset watermark is not moved
+    skipped_videos = []
     if scenario == Scenario.CHECK:
-        existing_videos_list = dst_api.video.get_list(dst_dataset.id)
-        existing_videos = {
-            existing_video.name: existing_video for existing_video in existing_videos_list
-        }
-    with progress_items(
-        message=f"Synchronizing videos for Dataset: {src_dataset.name}", total=len(src_videos)
-    ) as pbar:
-        for src_video in src_videos:
-            src_name = Path(src_video.name)
-            src_name = src_name.with_suffix(src_name.suffix.lower())
-            src_name_str = str(src_name)
-            sly.logger.debug(f"Adjusted video extension in {src_video.name} to lower case: {src_name_str}")
-            if scenario == Scenario.CHECK:
-                if src_name_str in existing_videos:
-                    dst_video = existing_videos[src_name_str]
-                    if src_video.updated_at <= dst_video.updated_at:
-                        pbar.update()
-                        continue
-                    else:
-                        dst_api.video.remove(dst_video.id)
-            try:
-                if src_video.link is not None and is_fast_mode:
-                    link = src_video.link
-                    if need_change_link:
-                        link = change_link(bucket_path, link)
-                    dst_video = dst_api.video.upload_link(
-                        dataset_id=dst_dataset.id,
-                        link=link,
-                        name=src_name_str,
-                        skip_download=True,
-                    )
-                elif src_video.hash is not None:
-                    dst_video = dst_api.video.upload_hash(
-                        dataset_id=dst_dataset.id, name=src_name_str, hash=src_video.hash
-                    )
+        existing_videos = get_existing_items(
+            manifest, ProjectType.VIDEOS.value, dst_dataset, dst_api.video.get_list
+        )
+    copier = AnnotationCopier(dst_api, dst_dataset.project_id)
+    # Videos are transferred by g.video_workers threads, every video goes through its own
+    # upload -> annotation -> custom data steps.
+    # Concurrent ffmpeg runs are limited by _ffmpeg_slots.
+    workers = max(1, min(g.video_workers, len(src_videos)))
+
+    def update_annotation(src_video: VideoInfo, dst_video, force: bool = False) -> bool:
+        """
+        Update annotation and custom data of the video which media has not changed.
+        Annotation is replaced only if it differs from the one recorded in the manifest or `force`.
+        """
+        try:
+            ann_json = src_api.video.annotation.download(video_id=src_video.id)
+            ann_fingerprint = get_ann_fingerprint(ann_json)
+            synced = manifest.get(ProjectType.VIDEOS.value, src_video.id) if manifest else None
+            if force or synced is None or synced.ann_fingerprint != ann_fingerprint:
+                replace_video_annotation(
+                    dst_api, copier, ann_json, meta, dst_video.id, dst_dataset.id, src_video.name
+                )
+            if src_video.custom_data is not None and len(src_video.custom_data) > 0:
+                dst_api.video.update_custom_data(id=dst_video.id, data=src_video.custom_data)
+        except Exception:
+            sly.logger.warning(
+                f"Failed to update annotation for video '{src_video.name}'. Skipping.",
+                exc_info=True,
+            )
+            _log_skipped_video(dst_api, src_video)
+            return False
+        if manifest is not None:
+            manifest.record(
+                ProjectType.VIDEOS.value,
+                src_video.id,
+                dst_video.id,
+                dst_dataset.id,
+                dst_video.name,
+                src_video.hash,
+                # annotation of the destination video is up to date with the source
+                max(src_video.updated_at, dst_video.updated_at),
+                ann_fingerprint,
+            )
+        return True
+
+    def transfer_video(src_video: VideoInfo) -> bool:
+        """Transfer the video with its annotation. Returns False if the video is skipped."""
+        src_name = Path(src_video.name)
+        src_name = src_name.with_suffix(src_name.suffix.lower())
+        src_name_str = str(src_name)
+        sly.logger.debug(f"Adjusted video extension in {src_video.name} to lower case: {src_name_str}")
+        if scenario == Scenario.CHECK:
+            if src_name_str in existing_videos:
+                dst_video = existing_videos[src_name_str]
+                if src_video.updated_at <= dst_video.updated_at:
+                    if is_interrupted_item(checkpoint, src_dataset, src_video):
+                        # uploaded by the stopped task, the annotation could be partially copied
+                        return update_annotation(src_video, dst_video, force=True)
+                    if manifest is not None:
+                        manifest.record(
+                            ProjectType.VIDEOS.value,
+                            src_video.id,
+                            dst_video.id,
+                            dst_dataset.id,
+                            dst_video.name,
+                            src_video.hash,
+                            dst_video.updated_at,
+                        )
+                    return True
+                elif src_video.hash is not None and src_video.hash == dst_video.hash:
+                    # media is the same, only annotation or custom data could change
+                    return update_annotation(src_video, dst_video)
                 else:
-                    raise ValueError(
-                        f"No hash or link available for video '{src_name_str}'."
-                        "Attempting to upload video with path."
+                    dst_api.video.remove(dst_video.id)
+        try:
+            if src_video.link is not None and is_fast_mode:
+                link = src_video.link
+                if need_change_link:
+                    link = change_link(bucket_path, link)
+                dst_video = dst_api.video.upload_link(
+                    dataset_id=dst_dataset.id,
+                    link=link,
+                    name=src_name_str,
+                    skip_download=True,
+                )
+            elif src_video.hash is not None:
+                dst_video = dst_api.video.upload_hash(
+                    dataset_id=dst_dataset.id, name=src_name_str, hash=src_video.hash
+                )
+            else:
+                raise ValueError(
+                    f"No hash or link available for video '{src_name_str}'."
+                    "Attempting to upload video with path."
+                )
+        except Exception:
+            video_path = str(Path(storage_dir, src_name))
+            result_path = video_path if video_path.endswith(".mp4") else video_path + ".mp4"
+            cache_key = None
+            if g.transcode_videos and src_video.hash is not None:
+                # the mode is chosen by probing the source, so it is the same for the same hash
+                cache_key = TranscodeCache.get_key(
+                    src_video.hash,
+                    video_codec=DEFAULT_VIDEO_CODEC,
+                    audio_codec=DEFAULT_AUDIO_CODEC,
+                    mode="auto",
+                    segmented=g.segmented_transcode,
+                    segment_duration=g.transcode_segment_duration,
+                    segmented_min_duration=g.transcode_segmented_min_duration,
+                )
+            # transcoded video from the cache replaces both download and transcode
+            transcoded = cache_key is not None and get_transcode_cache().get(cache_key, result_path)
+            if transcoded:
+                sly.logger.info(f"Transcoded video {src_name_str} is taken from cache.")
+            download_path = not transcoded
+            if src_video.link is not None and not transcoded:
+                try:
+                    if src_api.remote_storage.is_bucket_url(src_video.link):
+                        src_api.storage.download(g.src_team_id, src_video.link, video_path)
+                    else:
+                        download_video_external_link(src_video.link, video_path)
+                    download_path = False
+                except Exception:
+                    sly.logger.warning(
+                        f"Failed to download video via link: {src_video.link}."
+                        "Attempting to download video with path."
                     )
-            except Exception:
-                video_path = str(Path(storage_dir, src_name))
-                download_path = True
-                if src_video.link is not None:
-                    try:
-                        if src_api.remote_storage.is_bucket_url(src_video.link):
-                            src_api.storage.download(g.src_team_id, src_video.link, video_path)
-                        else:
-                            download_video_external_link(src_video.link, video_path)
-                        download_path = False
-                    except Exception:
-                        sly.logger.warning(
-                            f"Failed to download video via link: {src_video.link}."
-                            "Attempting to download video with path."
-                        )
-                        download_path = True
-                
-                if download_path:
+                    download_path = True
+
+            if download_path:
+                if workers == 1:
                     with progress_download_item(
                         message=f"Downloading video: {src_name_str}",
                         total=int(src_video.file_meta.get("size", 0)),
                         unit="B",
                         unit_scale=True,
                     ) as pbar_it:
-                        src_api.video.download_path(id=src_video.id, path=video_path, progress_cb=pbar_it.update)
-
-                if g.transcode_videos:
-                    try:
-                        sly.logger.info(
-                            f"Transcoding video: {video_path} to mp4 format."
-                        )
-                        output_path = _transcode(video_path, video_path + "_transcoded.mp4")
-                    except Exception:
-                        sly.logger.warning(
-                            "Failed to transcode video: %s. Process will be skipped.", video_path, exc_info=True
-                        )
-                        _log_skipped_video(dst_api, src_video)
-                        pbar.update()
-                        continue
-                    else:
-                        result_path = video_path if video_path.endswith(".mp4") else video_path + ".mp4"
-                        shutil.move(output_path, result_path)
-                        sly.logger.info(
-                            f"Video transcoded successfully: {result_path}"
+                        download_resumable(
+                            src_api,
+                            DownloadMethod.VIDEO,
+                            src_video.id,
+                            video_path,
+                            progress_cb=pbar_it.update,
                         )
                 else:
-                    result_path = video_path
+                    # download progress widget can not be shared by parallel downloads
+                    download_resumable(src_api, DownloadMethod.VIDEO, src_video.id, video_path)
+
+            if g.transcode_videos and not transcoded:
                 try:
-                    dst_video = g.dst_api_task.video.upload_path(
-                        dataset_id=dst_dataset.id,
-                        name=src_name_str,
-                        path=result_path,
-                        meta=src_video.meta,
+                    sly.logger.info(
+                        f"Transcoding video: {video_path} to mp4 format."
                     )
-                except Exception as e:
+                    # segments of long videos share the ffmpeg slots with other videos
+                    output_path = transcode(
+                        video_path,
+                        video_path + "_transcoded.mp4",
+                        segmented=g.segmented_transcode,
+                        segment_duration=g.transcode_segment_duration,
+                        segmented_min_duration=g.transcode_segmented_min_duration,
+                        segment_workers=g.ffmpeg_workers,
+                        slots=_ffmpeg_slots,
+                    )
+                except Exception:
                     sly.logger.warning(
-                        f"Failed to upload source video '{src_video.id}: {src_name_str}' to "
-                        f"destination dataset '{dst_dataset.id}: {dst_dataset.name}'. Skipping",
-                        exc_info=True,
+                        "Failed to transcode video: %s. Process will be skipped.", video_path, exc_info=True
                     )
-                    pbar.update()
-                    continue
-                finally:
+                    _log_skipped_video(dst_api, src_video)
                     silent_remove(video_path)
-                    silent_remove(result_path)
-
+                    return False
+                else:
+                    shutil.move(output_path, result_path)
+                    sly.logger.info(
+                        f"Video transcoded successfully: {result_path}"
+                    )
+                    if cache_key is not None:
+                        get_transcode_cache().put(cache_key, result_path)
+            elif not g.transcode_videos:
+                result_path = video_path
             try:
-                ann_json = src_api.video.annotation.download(video_id=src_video.id)
-                ann = sly.VideoAnnotation.from_json(
-                    data=ann_json, project_meta=meta, key_id_map=key_id_map
+                dst_video = g.dst_api_task.video.upload_path(
+                    dataset_id=dst_dataset.id,
+                    name=src_name_str,
+                    path=result_path,
+                    meta=src_video.meta,
                 )
-                dst_api.video.annotation.append(video_id=dst_video.id, ann=ann, key_id_map=key_id_map)
-                if src_video.custom_data is not None and len(src_video.custom_data) > 0:
-                    dst_api.video.update_custom_data(id=dst_video.id, data=src_video.custom_data)
             except Exception as e:
                 sly.logger.warning(
-                    f"Failed to upload annotation for video '{src_name_str}'."
-                    "Skipping annotation upload and deleting video.",
+                    f"Failed to upload source video '{src_video.id}: {src_name_str}' to "
+                    f"destination dataset '{dst_dataset.id}: {dst_dataset.name}'. Skipping",
                     exc_info=True,
                 )
-                g.dst_api_task.video.remove(dst_video.id)
-                _log_skipped_video(dst_api, src_video)
+                return False
+            finally:
+                silent_remove(video_path)
+                silent_remove(result_path)
+
+        try:
+            ann_json = src_api.video.annotation.download(video_id=src_video.id)
+            append_video_annotation(
+                dst_api, copier, ann_json, meta, dst_video.id, dst_dataset.id, src_name_str
+            )
+            if src_video.custom_data is not None and len(src_video.custom_data) > 0:
+                dst_api.video.update_custom_data(id=dst_video.id, data=src_video.custom_data)
+            if manifest is not None:
+                manifest.record(
+                    ProjectType.VIDEOS.value,
+                    src_video.id,
+                    dst_video.id,
+                    dst_dataset.id,
+                    dst_video.name,
+                    src_video.hash,
+                    dst_video.updated_at,
+                    get_ann_fingerprint(ann_json),
+                )
+        except Exception as e:
+            sly.logger.warning(
+                f"Failed to upload annotation for video '{src_name_str}'."
+                "Skipping annotation upload and deleting video.",
+                exc_info=True,
+            )
+            g.dst_api_task.video.remove(dst_video.id)
+            _log_skipped_video(dst_api, src_video)
+            return False
+        return True
+
+    items_checkpointer = ItemsCheckpointer(checkpoint, src_dataset, src_videos)
+    with progress_items(
+        message=f"Synchronizing videos for Dataset: {src_dataset.name}", total=len(src_videos)
+    ) as pbar:
+
+        def item_done(src_video: VideoInfo, transferred: bool):
+            if not transferred:
+                skipped_videos.append(src_video)
             pbar.update()
+            items_checkpointer.done(src_video)
+
+        if workers == 1:
+            for src_video in src_videos:
+                item_done(src_video, transfer_video(src_video))
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(transfer_video, src_video): src_video
+                    for src_video in src_videos
+                }
+                try:
+                    for future in as_completed(futures):
+                        item_done(futures[future], future.result())
+                except Exception:
+                    for future in futures:
+                        future.cancel()
+                    raise
+    if len(skipped_videos) == 0:
+        save_dataset_watermark(manifest, src_dataset, dst_dataset, src_videos_list, updated_after)
+
+
+def copy_spatial_figures_geometries(
+    src_api: sly.Api,
+    dst_api: sly.Api,
+    src_figure_ids: List[int],
+    dst_figure_ids: List[int],
+):
+    """
+    Copy mask geometries of volume spatial figures without storing them on disk.
+
+    Geometries are downloaded in bulk requests and every one is uploaded as soon as it is
+    received. The number of figures per request follows the largest geometry seen so far,
+    so one response stays under `g.volume_geometries_max_bytes` (a single larger mask is
+    still requested alone).
+    """
+    dst_ids = dict(zip(src_figure_ids, dst_figure_ids))
+    largest = None
+    idx = 0
+    while idx < len(src_figure_ids):
+        if largest is None:
+            count = 1
+        else:
+            count = max(1, min(BATCH_SIZE, g.volume_geometries_max_bytes // max(largest, 1)))
+        batch_ids = src_figure_ids[idx : idx + count]
+        idx += len(batch_ids)
+        for figure_id, part in src_api.volume.figure._download_geometries_batch(batch_ids):
+            largest = max(largest or 0, len(part.content))
+            # the same request as in `api.volume.figure.upload_sf_geometry`
+            dst_id = str(dst_ids[figure_id])
+            encoder = MultipartEncoder(
+                fields={
+                    ApiField.FIGURE_ID: dst_id,
+                    ApiField.GEOMETRY: (dst_id, part.content, "application/sla"),
+                }
+            )
+            dst_api.post("figures.bulk.upload.geometry", encoder)
+
+
+def append_volume_annotation(
+    api: sly.Api,
+    copier: AnnotationCopier,
+    ann_json: dict,
+    meta: sly.ProjectMeta,
+    volume_id: int,
+    dataset_id: int,
+    item_name: str,
+) -> Tuple[List[int], List[int]]:
+    """
+    Append the annotation to the volume.
+    Returns source and destination IDs of spatial figures which geometries are to be copied.
+    """
+    if g.raw_annotations:
+        try:
+            return copier.copy_volume(ann_json, volume_id, dataset_id)
+        except UnsupportedAnnotation as e:
+            sly.logger.info(f"Annotation of '{item_name}' is copied with SDK objects: {e}")
+    key_id_map = KeyIdMap()
+    ann = sly.VolumeAnnotation.from_json(data=ann_json, project_meta=meta, key_id_map=key_id_map)
+    # source IDs are replaced with destination ones in key_id_map on append
+    src_figure_ids = [key_id_map.get_figure_id(sf.key()) for sf in ann.spatial_figures]
+    api.volume.annotation.append(volume_id=volume_id, ann=ann, key_id_map=key_id_map)
+    dst_figure_ids = [key_id_map.get_figure_id(sf.key()) for sf in ann.spatial_figures]
+    return src_figure_ids, dst_figure_ids
 
 
 def process_volumes(
@@ -597,74 +1363,309 @@ def process_volumes(
     bucket_path: str = None,
     scenario: str = Scenario.NOT_SET,
     progress_download_item: Optional[Progress] = None,
+    storage_dir: str = "storage",
+    manifest: SyncManifest = None,
+    checkpoint: SyncCheckpoint = None,
+    updated_after: str = None,
 ):
-    storage_dir = "storage"
     mkdir(storage_dir, True)
-    key_id_map = KeyIdMap()
-    geometries_dir = f"geometries_{src_dataset.id}"
-    sly.fs.mkdir(geometries_dir, True)
-    src_volumes: List[VolumeInfo] = src_api.volume.get_list(dataset_id=src_dataset.id)
+    src_volumes_list = src_api.volume.get_list(
+        dataset_id=src_dataset.id, filters=get_updated_after_filters(updated_after)
+    )
+    src_volumes: List[VolumeInfo] = skip_synchronized_items(
+        checkpoint, src_dataset, src_volumes_list
+    )
     if scenario == Scenario.CHECK:
-        existing_volumes_list = dst_api.volume.get_list(dst_dataset.id)
-        existing_volumes = {
-            existing_volume.name: existing_volume for existing_volume in existing_volumes_list
-        }
-    with progress_items(
-        message=f"Synchronizing volumes for Dataset: {src_dataset.name}", total=len(src_volumes)
-    ) as pbar:
-        # sly.download_volume_project
-        for src_volume in src_volumes:
-            if scenario == Scenario.CHECK:
-                if src_volume.name in existing_volumes:
-                    dst_volume = existing_volumes[src_volume.name]
-                    if src_volume.updated_at <= dst_volume.updated_at:
-                        pbar.update()
-                        continue
-                    else:
-                        dst_api.video.remove(dst_volume.id)  # method works for any entity type
-            try:
-                if src_volume.hash:
-                    dst_volume = dst_api.volume.upload_hash(
-                        dataset_id=dst_dataset.id,
-                        name=src_volume.name,
-                        hash=src_volume.hash,
-                        meta=src_volume.meta,
-                    )
+        existing_volumes = get_existing_items(
+            manifest, ProjectType.VOLUMES.value, dst_dataset, dst_api.volume.get_list
+        )
+    copier = AnnotationCopier(dst_api, dst_dataset.project_id)
+    # Volumes are transferred by g.volume_workers threads, so downloading of one serie overlaps
+    # uploading of another. Every volume has its own KeyIdMap, workers share no annotation state.
+    workers = max(1, min(g.volume_workers, len(src_volumes)))
+
+    def transfer_volume(src_volume: VolumeInfo):
+        if scenario == Scenario.CHECK:
+            if src_volume.name in existing_volumes:
+                dst_volume = existing_volumes[src_volume.name]
+                if src_volume.updated_at <= dst_volume.updated_at and not is_interrupted_item(
+                    checkpoint, src_dataset, src_volume
+                ):
+                    if manifest is not None:
+                        manifest.record(
+                            ProjectType.VOLUMES.value,
+                            src_volume.id,
+                            dst_volume.id,
+                            dst_dataset.id,
+                            dst_volume.name,
+                            src_volume.hash,
+                            dst_volume.updated_at,
+                        )
+                    return
                 else:
-                    raise ValueError(
-                        f"No hash available for volume '{src_volume.name}'."
-                        "Attempting to upload volume with path."
-                    )
-            except Exception:
-                volume_path = os.path.join(storage_dir, src_volume.name)
-                src_api.volume.download_path(id=src_volume.id, path=volume_path)
+                    dst_api.video.remove(dst_volume.id)  # method works for any entity type
+        try:
+            if src_volume.hash:
+                dst_volume = dst_api.volume.upload_hash(
+                    dataset_id=dst_dataset.id,
+                    name=src_volume.name,
+                    hash=src_volume.hash,
+                    meta=src_volume.meta,
+                )
+            else:
+                raise ValueError(
+                    f"No hash available for volume '{src_volume.name}'."
+                    "Attempting to upload volume with path."
+                )
+        except Exception:
+            volume_path = os.path.join(storage_dir, src_volume.name)
+            download_resumable(src_api, DownloadMethod.VOLUME, src_volume.id, volume_path)
+            try:
                 dst_volume = dst_api.volume.upload_nrrd_serie_path(
                     dataset_id=dst_dataset.id, name=src_volume.name, path=volume_path
                 )
+            finally:
                 silent_remove(volume_path)
 
-            ann_json = src_api.volume.annotation.download(volume_id=src_volume.id)
-            ann = sly.VolumeAnnotation.from_json(
-                data=ann_json, project_meta=meta, key_id_map=key_id_map
-            )
-            dst_api.volume.annotation.append(
-                volume_id=dst_volume.id, ann=ann, key_id_map=key_id_map
+        ann_json = src_api.volume.annotation.download(volume_id=src_volume.id)
+        src_figure_ids, dst_figure_ids = append_volume_annotation(
+            dst_api, copier, ann_json, meta, dst_volume.id, dst_dataset.id, src_volume.name
+        )
+        if len(src_figure_ids) > 0:
+            copy_spatial_figures_geometries(src_api, dst_api, src_figure_ids, dst_figure_ids)
+        if manifest is not None:
+            manifest.record(
+                ProjectType.VOLUMES.value,
+                src_volume.id,
+                dst_volume.id,
+                dst_dataset.id,
+                dst_volume.name,
+                src_volume.hash,
+                dst_volume.updated_at,
+                get_ann_fingerprint(ann_json),
             )
-            if ann.spatial_figures:
-                geometries = []
-                for sf in ann_json.get("spatialFigures"):
-                    sf_id = sf.get("id")
-                    path = os.path.join(geometries_dir, f"{sf_id}.nrrd")
-                    src_api.volume.figure.download_sf_geometries([sf_id], [path])
-                    with open(path, "rb") as file:
-                        geometry_bytes = file.read()
-                    geometries.append(geometry_bytes)
-                dst_api.volume.figure.upload_sf_geometry(
-                    ann.spatial_figures, geometries, key_id_map=key_id_map
-                )
-                del geometries
+
+    items_checkpointer = ItemsCheckpointer(checkpoint, src_dataset, src_volumes)
+    with progress_items(
+        message=f"Synchronizing volumes for Dataset: {src_dataset.name}", total=len(src_volumes)
+    ) as pbar:
+
+        def item_done(src_volume: VolumeInfo):
             pbar.update()
-        sly.fs.remove_dir(geometries_dir)
+            items_checkpointer.done(src_volume)
+
+        # sly.download_volume_project
+        if workers == 1:
+            for src_volume in src_volumes:
+                transfer_volume(src_volume)
+                item_done(src_volume)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(transfer_volume, src_volume): src_volume
+                    for src_volume in src_volumes
+                }
+                try:
+                    for future in as_completed(futures):
+                        future.result()
+                        item_done(futures[future])
+                except Exception:
+                    for future in futures:
+                        future.cancel()
+                    raise
+    save_dataset_watermark(manifest, src_dataset, dst_dataset, src_volumes_list, updated_after)
+
+
+def get_related_images(
+    api: sly.Api, dataset_id: int, entity_ids: List[int]
+) -> Dict[int, List[dict]]:
+    """
+    Related images of point clouds (or episode frames) by point cloud ID.
+    A few items are listed one by one, otherwise related images of the whole dataset are
+    listed at once and only the ones of `entity_ids` are kept.
+    """
+    entity_ids = set(entity_ids)
+    related_images = defaultdict(list)
+    if len(entity_ids) <= RELATED_IMAGES_LIST_THRESHOLD:
+        for entity_id in entity_ids:
+            related_images[entity_id] = api.pointcloud.get_list_related_images(id=entity_id)
+        return related_images
+    rel_images = api.pointcloud.get_list_all_pages(
+        "point-clouds.images.list",
+        {ApiField.DATASET_ID: dataset_id},
+        convert_json_info_cb=lambda x: x,
+    )
+    for rel_img in rel_images:
+        if rel_img[ApiField.ENTITY_ID] in entity_ids:
+            related_images[rel_img[ApiField.ENTITY_ID]].append(rel_img)
+    return related_images
+
+
+def upload_related_images_by_paths(
+    src_api: sly.Api, dst_api: sly.Api, rel_images: List[dict], storage_dir: str
+) -> Dict[int, str]:
+    """
+    Download related images and upload them to the destination.
+    Images are downloaded by `g.related_images_workers` threads in batches of
+    RELATED_IMAGES_BATCH_SIZE. Returns destination hashes by source related image ID.
+    """
+    images_dir = os.path.join(storage_dir, "related_images")
+    mkdir(images_dir)
+    hashes = {}
+
+    def download(rel_img: dict) -> str:
+        path = os.path.join(images_dir, f"{rel_img[ApiField.ID]}_{rel_img[ApiField.NAME]}")
+        src_api.pointcloud.download_related_image(id=rel_img[ApiField.ID], path=path)
+        return path
+
+    with ThreadPoolExecutor(max_workers=g.related_images_workers) as executor:
+        for batch in batched(rel_images, RELATED_IMAGES_BATCH_SIZE):
+            paths = list(executor.map(download, batch))
+            try:
+                uploaded_hashes = dst_api.pointcloud.upload_related_images(paths)
+            finally:
+                for path in paths:
+                    silent_remove(path)
+            for rel_img, img_hash in zip(batch, uploaded_hashes):
+                hashes[rel_img[ApiField.ID]] = img_hash
+    return hashes
+
+
+def copy_related_images(
+    src_api: sly.Api,
+    dst_api: sly.Api,
+    related_images: Dict[int, List[dict]],
+    dst_ids: Dict[int, int],
+    storage_dir: str,
+):
+    """
+    Attach related images of source point clouds to destination ones (`dst_ids` maps source
+    point cloud IDs to destination IDs). Hashes are checked on the destination in one pass,
+    only missing images are downloaded and uploaded, see `upload_related_images_by_paths`.
+    """
+    rel_images = [
+        (dst_id, rel_img)
+        for src_id, dst_id in dst_ids.items()
+        for rel_img in related_images.get(src_id, [])
+    ]
+    if len(rel_images) == 0:
+        return
+    hashes = list({rel_img[ApiField.HASH] for _, rel_img in rel_images if rel_img[ApiField.HASH]})
+    existing_hashes = set(dst_api.pointcloud.check_existing_hashes(hashes))
+    # images with the same hash are uploaded once
+    missing = {}
+    for _, rel_img in rel_images:
+        if rel_img[ApiField.HASH] not in existing_hashes:
+            missing.setdefault(rel_img[ApiField.HASH] or rel_img[ApiField.ID], rel_img)
+    new_hashes = {}
+    if len(missing) > 0:
+        sly.logger.info(
+            f"{len(missing)} related images are not found on destination by hash. "
+            "Uploading related images with paths."
+        )
+        uploaded = upload_related_images_by_paths(
+            src_api, dst_api, list(missing.values()), storage_dir
+        )
+        for key, rel_img in missing.items():
+            new_hashes[key] = uploaded[rel_img[ApiField.ID]]
+
+    rimg_infos = []
+    for dst_id, rel_img in rel_images:
+        img_hash = rel_img[ApiField.HASH]
+        rimg_infos.append(
+            {
+                ApiField.ENTITY_ID: dst_id,
+                ApiField.NAME: rel_img[ApiField.NAME],
+                ApiField.HASH: new_hashes.get(img_hash or rel_img[ApiField.ID], img_hash),
+                ApiField.META: rel_img[ApiField.META],
+            }
+        )
+    for batch in batched(rimg_infos, RELATED_IMAGES_BATCH_SIZE):
+        dst_api.pointcloud.add_related_images(batch)
+
+
+def upload_pointclouds(
+    src_api: sly.Api,
+    dst_pcd_api,
+    dst_dataset: DatasetInfo,
+    src_pcds: List[PointcloudInfo],
+    storage_dir: str,
+) -> Dict[int, PointcloudInfo]:
+    """
+    Upload point clouds or episode frames (`dst_pcd_api` is `api.pointcloud` or
+    `api.pointcloud_episode`) to the destination dataset.
+
+    Hashes are checked on the destination in one pass and the found ones are added with
+    a bulk request. The rest are downloaded and uploaded by `g.pointcloud_workers` threads.
+    Returns destination infos by source point cloud ID.
+    """
+    dst_pcds = {}
+    hashes = list({pcd.hash for pcd in src_pcds if pcd.hash})
+    existing_hashes = set(dst_pcd_api.check_existing_hashes(hashes)) if len(hashes) > 0 else set()
+    by_hash = [pcd for pcd in src_pcds if pcd.hash in existing_hashes]
+    by_path = [pcd for pcd in src_pcds if pcd.hash not in existing_hashes]
+    if len(by_hash) > 0:
+        try:
+            infos = dst_pcd_api.upload_hashes(
+                dataset_id=dst_dataset.id,
+                names=[pcd.name for pcd in by_hash],
+                hashes=[pcd.hash for pcd in by_hash],
+                metas=[pcd.meta for pcd in by_hash],
+            )
+            dst_pcds.update({pcd.id: info for pcd, info in zip(by_hash, infos)})
+        except Exception:
+            sly.logger.warning(
+                f"Failed to upload {len(by_hash)} point clouds by hashes. "
+                "Attempting to upload point clouds with paths.",
+                exc_info=True,
+            )
+            by_path = by_hash + by_path
+
+    def upload_path(src_pcd: PointcloudInfo) -> PointcloudInfo:
+        pcd_path = os.path.join(storage_dir, src_pcd.name)
+        download_resumable(src_api, DownloadMethod.POINTCLOUD, src_pcd.id, pcd_path)
+        try:
+            return dst_pcd_api.upload_path(
+                dataset_id=dst_dataset.id, name=src_pcd.name, path=pcd_path, meta=src_pcd.meta
+            )
+        finally:
+            silent_remove(pcd_path)
+
+    if len(by_path) > 0:
+        workers = max(1, min(g.pointcloud_workers, len(by_path)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(upload_path, pcd): pcd for pcd in by_path}
+            try:
+                for future in as_completed(futures):
+                    dst_pcds[futures[future].id] = future.result()
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+    return dst_pcds
+
+
+def append_pointcloud_annotation(
+    api: sly.Api,
+    copier: AnnotationCopier,
+    ann_json: dict,
+    meta: sly.ProjectMeta,
+    pointcloud_id: int,
+    dataset_id: int,
+    item_name: str,
+):
+    copied = copy_raw_annotation(
+        lambda: copier.copy_pointcloud(ann_json, pointcloud_id, dataset_id), item_name
+    )
+    if not copied:
+        # the key-id map is scoped to the point cloud, so it does not grow with the dataset
+        key_id_map = KeyIdMap()
+        ann = sly.PointcloudAnnotation.from_json(
+            data=ann_json, project_meta=meta, key_id_map=key_id_map
+        )
+        api.pointcloud.annotation.append(
+            pointcloud_id=pointcloud_id, ann=ann, key_id_map=key_id_map
+        )
 
 
 def process_pcd(
@@ -679,87 +1680,141 @@ def process_pcd(
     bucket_path: str = None,
     scenario: str = Scenario.NOT_SET,
     progress_download_item: Optional[Progress] = None,
+    storage_dir: str = "storage",
+    manifest: SyncManifest = None,
+    checkpoint: SyncCheckpoint = None,
+    updated_after: str = None,
 ):
-    storage_dir = "storage"
     mkdir(storage_dir, True)
-    key_id_map_initial = KeyIdMap()
-    key_id_map_new = KeyIdMap()
-    src_pcds: List[PointcloudInfo] = src_api.pointcloud.get_list(dataset_id=src_dataset.id)
+    src_pcds_list = src_api.pointcloud.get_list(
+        dataset_id=src_dataset.id, filters=get_updated_after_filters(updated_after)
+    )
+    src_pcds: List[PointcloudInfo] = skip_synchronized_items(checkpoint, src_dataset, src_pcds_list)
     if scenario == Scenario.CHECK:
-        existing_pcds_list = dst_api.pointcloud.get_list(dst_dataset.id)
-        existing_pcds = {existing_pcd.name: existing_pcd for existing_pcd in existing_pcds_list}
+        existing_pcds = get_existing_items(
+            manifest, ProjectType.POINT_CLOUDS.value, dst_dataset, dst_api.pointcloud.get_list
+        )
+    related_images = get_related_images(src_api, src_dataset.id, [pcd.id for pcd in src_pcds])
+    copier = AnnotationCopier(dst_api, dst_dataset.project_id)
+
+    def is_synchronized(src_pcd: PointcloudInfo) -> bool:
+        """Check the existing destination point cloud, outdated one is removed."""
+        if scenario != Scenario.CHECK or src_pcd.name not in existing_pcds:
+            return False
+        dst_pcd = existing_pcds[src_pcd.name]
+        # point clouds uploaded by the stopped task are uploaded again with their annotation
+        if src_pcd.updated_at <= dst_pcd.updated_at and not is_interrupted_item(
+            checkpoint, src_dataset, src_pcd
+        ):
+            if manifest is not None:
+                manifest.record(
+                    ProjectType.POINT_CLOUDS.value,
+                    src_pcd.id,
+                    dst_pcd.id,
+                    dst_dataset.id,
+                    dst_pcd.name,
+                    src_pcd.hash,
+                    dst_pcd.updated_at,
+                )
+            return True
+        dst_api.video.remove(dst_pcd.id)  # method works for any entity type
+        return False
+
     with progress_items(
         message=f"Synchronizing point clouds for Dataset: {src_dataset.name}", total=len(src_pcds)
     ) as pbar:
-        for src_pcd in src_pcds:
-            if scenario == Scenario.CHECK:
-                if src_pcd.name in existing_pcds:
-                    dst_pcd = existing_pcds[src_pcd.name]
-                    if src_pcd.updated_at <= dst_pcd.updated_at:
-                        pbar.update()
-                        continue
-                    else:
-                        dst_api.video.remove(dst_pcd.id)  # method works for any entity type
-            try:
-                if src_pcd.hash:
-                    dst_pcd = dst_api.pointcloud.upload_hash(
-                        dataset_id=dst_dataset.id,
-                        name=src_pcd.name,
-                        hash=src_pcd.hash,
-                        meta=src_pcd.meta,
-                    )
-                else:
-                    raise ValueError(
-                        f"No hash available for point cloud '{src_pcd.name}'."
-                        "Attempting to upload point cloud with path."
-                    )
-            except Exception:
-                pcd_path = os.path.join(storage_dir, src_pcd.name)
-                src_api.pointcloud.download_path(id=src_pcd.id, path=pcd_path)
-                dst_pcd = dst_api.pointcloud.upload_path(
-                    dataset_id=dst_dataset.id, name=src_pcd.name, path=pcd_path, meta=src_pcd.meta
-                )
-                silent_remove(pcd_path)
-
-            ann_json = src_api.pointcloud.annotation.download(pointcloud_id=src_pcd.id)
-            ann = sly.PointcloudAnnotation.from_json(
-                data=ann_json, project_meta=meta, key_id_map=key_id_map_initial
+        # point clouds are uploaded and related images are attached to a batch at once,
+        # the batch is recorded to the manifest and the checkpoint only after that
+        for pcds_batch in batched(src_pcds, BATCH_SIZE):
+            to_upload = [src_pcd for src_pcd in pcds_batch if not is_synchronized(src_pcd)]
+            dst_pcds = upload_pointclouds(
+                src_api, dst_api.pointcloud, dst_dataset, to_upload, storage_dir
             )
-            dst_api.pointcloud.annotation.append(
-                pointcloud_id=dst_pcd.id, ann=ann, key_id_map=key_id_map_new
+            ann_fingerprints = {}
+            for src_pcd in to_upload:
+                ann_json = src_api.pointcloud.annotation.download(pointcloud_id=src_pcd.id)
+                ann_fingerprints[src_pcd.id] = get_ann_fingerprint(ann_json)
+                append_pointcloud_annotation(
+                    dst_api,
+                    copier,
+                    ann_json,
+                    meta,
+                    dst_pcds[src_pcd.id].id,
+                    dst_dataset.id,
+                    src_pcd.name,
+                )
+            copy_related_images(
+                src_api,
+                dst_api,
+                related_images,
+                {src_id: dst_pcd.id for src_id, dst_pcd in dst_pcds.items()},
+                storage_dir,
             )
-            rel_images = src_api.pointcloud.get_list_related_images(id=src_pcd.id)
-            if len(rel_images) != 0:
-                rimg_infos = []
-                rimg_ids = []
-                for rel_img in rel_images:
-                    rimg_infos.append(
-                        {
-                            ApiField.ENTITY_ID: dst_pcd.id,
-                            ApiField.NAME: rel_img[ApiField.NAME],
-                            ApiField.HASH: rel_img[ApiField.HASH],
-                            ApiField.META: rel_img[ApiField.META],
-                        }
-                    )
-                    rimg_ids.append(rel_img[ApiField.ID])
-                try:
-                    dst_api.pointcloud.add_related_images(rimg_infos)
-                except Exception:
-                    sly.logger.info(
-                        f"Failed to add related images to point cloud '{src_pcd.name}'."
-                        "Attempting to upload related images with paths."
+            for src_pcd in pcds_batch:
+                if manifest is not None and src_pcd.id in dst_pcds:
+                    dst_pcd = dst_pcds[src_pcd.id]
+                    manifest.record(
+                        ProjectType.POINT_CLOUDS.value,
+                        src_pcd.id,
+                        dst_pcd.id,
+                        dst_dataset.id,
+                        dst_pcd.name,
+                        src_pcd.hash,
+                        dst_pcd.updated_at,
+                        ann_fingerprints[src_pcd.id],
                     )
-                    rimg_paths = []
-                    for rimg_info, rimg_id in zip(rimg_infos, rimg_ids):
-                        rimg_path = os.path.join(storage_dir, rimg_info[ApiField.NAME])
-                        rimg_paths.append(rimg_path)
-                        src_api.pointcloud.download_related_image(id=rimg_id, path=rimg_path)
-                    dst_api.pointcloud.upload_related_images(rimg_paths)
-                    dst_api.pointcloud.add_related_images(rimg_infos)
-                    for rimg_path in rimg_paths:
-                        silent_remove(rimg_path)
+                related_images.pop(src_pcd.id, None)
+                pbar.update()
+            if checkpoint is not None:
+                checkpoint.items_done(src_dataset.id, pcds_batch[-1].id)
+            log_memory_usage(
+                f"Batch of point clouds of dataset {src_dataset.name} done", debug=True
+            )
+    save_dataset_watermark(manifest, src_dataset, dst_dataset, src_pcds_list, updated_after)
 
-            pbar.update()
+
+def copy_episode_annotation(
+    dst_api: sly.Api,
+    ann_json: dict,
+    meta: sly.ProjectMeta,
+    dst_dataset: DatasetInfo,
+    frame_to_pointcloud_ids: dict,
+):
+    """
+    Copy the annotation of the episode from raw JSON frame by frame (see AnnotationCopier).
+    SDK annotation objects are used if raw annotations are disabled or not supported.
+    """
+    copier = AnnotationCopier(dst_api, dst_dataset.project_id)
+    copied = copy_raw_annotation(
+        lambda: copier.copy_episode(ann_json, dst_dataset.id, frame_to_pointcloud_ids),
+        dst_dataset.name,
+    )
+    if copied:
+        return
+    ann = sly.PointcloudEpisodeAnnotation.from_json(
+        data=ann_json, project_meta=meta, key_id_map=KeyIdMap()
+    )
+    dst_api.pointcloud_episode.annotation.append(
+        dataset_id=dst_dataset.id,
+        ann=ann,
+        frame_to_pointcloud_ids=frame_to_pointcloud_ids,
+        key_id_map=KeyIdMap(),
+    )
+
+
+def remove_episode_annotation(api: sly.Api, dataset_id: int):
+    """Remove figures and objects of the destination episode."""
+    current = api.pointcloud_episode.annotation.download(dataset_id=dataset_id)
+    figure_ids = [
+        figure[ApiField.ID]
+        for frame in current.get("frames", [])
+        for figure in frame.get("figures", [])
+    ]
+    if len(figure_ids) > 0:
+        api.pointcloud.figure.remove_batch(figure_ids)
+    object_ids = [obj[ApiField.ID] for obj in current.get("objects", [])]
+    if len(object_ids) > 0:
+        api.pointcloud_episode.object.remove_batch(object_ids)
 
 
 def process_pcde(
@@ -774,97 +1829,116 @@ def process_pcde(
     bucket_path: str = None,
     scenario: str = Scenario.NOT_SET,
     progress_download_item: Optional[Progress] = None,
+    storage_dir: str = "storage",
+    manifest: SyncManifest = None,
+    checkpoint: SyncCheckpoint = None,
+    updated_after: str = None,
 ):
-    storage_dir = "storage"
     mkdir(storage_dir, True)
-    key_id_map = KeyIdMap()
+    # all frames are listed regardless of `updated_after`:
+    # annotation of the episode is uploaded for the whole dataset
     src_pcdes = src_api.pointcloud_episode.get_list(dataset_id=src_dataset.id)
-    ann_json = src_api.pointcloud_episode.annotation.download(dataset_id=src_dataset.id)
-    ann = sly.PointcloudEpisodeAnnotation.from_json(
-        data=ann_json, project_meta=meta, key_id_map=KeyIdMap()
-    )
     if scenario == Scenario.CHECK:
-        existing_pcdes_list = dst_api.pointcloud_episode.get_list(dst_dataset.id)
-        existing_pcdes = {
-            existing_pcde.name: existing_pcde for existing_pcde in existing_pcdes_list
-        }
+        existing_pcdes = get_existing_items(
+            manifest,
+            ProjectType.POINT_CLOUD_EPISODES.value,
+            dst_dataset,
+            dst_api.pointcloud_episode.get_list,
+        )
+    related_images = get_related_images(src_api, src_dataset.id, [pcde.id for pcde in src_pcdes])
+    # frame index -> destination point cloud of uploaded frames, frames are the same in source
+    # and destination; unchanged frames are not mapped, they already have their annotation.
+    # If the stopped task was synchronizing the episode, its annotation could be partially
+    # copied, so the annotation of the destination episode is replaced on all frames.
     frame_to_pointcloud_ids = {}
+    interrupted = checkpoint is not None and checkpoint.is_dataset_interrupted(src_dataset.id)
+
+    def is_synchronized(src_pcde: PointcloudInfo) -> bool:
+        """Check the existing destination frame, outdated one is removed."""
+        if scenario != Scenario.CHECK or src_pcde.name not in existing_pcdes:
+            return False
+        dst_pcde = existing_pcdes[src_pcde.name]
+        if src_pcde.updated_at <= dst_pcde.updated_at:
+            if interrupted:
+                frame_to_pointcloud_ids[src_pcde.meta["frame"]] = dst_pcde.id
+            if manifest is not None:
+                manifest.record(
+                    ProjectType.POINT_CLOUD_EPISODES.value,
+                    src_pcde.id,
+                    dst_pcde.id,
+                    dst_dataset.id,
+                    dst_pcde.name,
+                    src_pcde.hash,
+                    dst_pcde.updated_at,
+                )
+            return True
+        dst_api.video.remove(dst_pcde.id)  # method works for any entity type
+        return False
+
     with progress_items(
         message=f"Synchronizing point cloud episodes for Dataset: {src_dataset.name}",
         total=len(src_pcdes),
     ) as pbar:
-        for src_pcde in src_pcdes:
-            if scenario == Scenario.CHECK:
-                if src_pcde.name in existing_pcdes:
-                    dst_pcde = existing_pcdes[src_pcde.name]
-                    if src_pcde.updated_at <= dst_pcde.updated_at:
-                        pbar.update()
-                        continue
-                    else:
-                        dst_api.video.remove(dst_pcde.id)  # method works for any entity type
-            try:
-                if src_pcde.hash:
-                    dst_pcde = dst_api.pointcloud_episode.upload_hash(
-                        dataset_id=dst_dataset.id,
-                        name=src_pcde.name,
-                        hash=src_pcde.hash,
-                        meta=src_pcde.meta,
-                    )
-                else:
-                    raise ValueError(
-                        f"No hash available for point cloud episode '{src_pcde.name}'."
-                        "Attempting to upload point cloud episode with path."
-                    )
-            except Exception:
-                pcde_path = os.path.join(storage_dir, src_pcde.name)
-                src_api.pointcloud_episode.download_path(id=src_pcde.id, path=pcde_path)
-                dst_pcde = dst_api.pointcloud_episode.upload_path(
-                    dataset_id=dst_dataset.id,
-                    name=src_pcde.name,
-                    path=pcde_path,
-                    meta=src_pcde.meta,
-                )
-                silent_remove(pcde_path)
-
-            frame_to_pointcloud_ids[dst_pcde.meta["frame"]] = dst_pcde.id
-            rel_images = src_api.pointcloud_episode.get_list_related_images(id=src_pcde.id)
-            if len(rel_images) != 0:
-                rimg_infos = []
-                rimg_ids = []
-                for rel_img in rel_images:
-                    rimg_infos.append(
-                        {
-                            ApiField.ENTITY_ID: dst_pcde.id,
-                            ApiField.NAME: rel_img[ApiField.NAME],
-                            ApiField.HASH: rel_img[ApiField.HASH],
-                            ApiField.META: rel_img[ApiField.META],
-                        }
-                    )
-                    rimg_ids.append(rel_img[ApiField.ID])
-                try:
-                    dst_api.pointcloud_episode.add_related_images(rimg_infos)
-                except Exception:
-                    sly.logger.info(
-                        f"Failed to add related images to point cloud episode'{src_pcde.name}'."
-                        "Attempting to upload related images with paths."
+        for pcdes_batch in batched(src_pcdes, BATCH_SIZE):
+            to_upload = [src_pcde for src_pcde in pcdes_batch if not is_synchronized(src_pcde)]
+            dst_pcdes = upload_pointclouds(
+                src_api, dst_api.pointcloud_episode, dst_dataset, to_upload, storage_dir
+            )
+            for src_pcde in to_upload:
+                frame_to_pointcloud_ids[src_pcde.meta["frame"]] = dst_pcdes[src_pcde.id].id
+            copy_related_images(
+                src_api,
+                dst_api,
+                related_images,
+                {src_id: dst_pcde.id for src_id, dst_pcde in dst_pcdes.items()},
+                storage_dir,
+            )
+            for src_pcde in pcdes_batch:
+                if manifest is not None and src_pcde.id in dst_pcdes:
+                    dst_pcde = dst_pcdes[src_pcde.id]
+                    manifest.record(
+                        ProjectType.POINT_CLOUD_EPISODES.value,
+                        src_pcde.id,
+                        dst_pcde.id,
+                        dst_dataset.id,
+                        dst_pcde.name,
+                        src_pcde.hash,
+                        dst_pcde.updated_at,
                     )
-                    rimg_paths = []
-                    for rimg_info, rimg_id in zip(rimg_infos, rimg_ids):
-                        rimg_path = os.path.join(storage_dir, rimg_info[ApiField.NAME])
-                        rimg_paths.append(rimg_path)
-                        src_api.pointcloud.download_related_image(id=rimg_id, path=rimg_path)
-                    dst_api.pointcloud.upload_related_images(rimg_paths)
-                    dst_api.pointcloud.add_related_images(rimg_infos)
-                    for rimg_path in rimg_paths:
-                        silent_remove(rimg_path)
-            pbar.update()
-
-        dst_api.pointcloud_episode.annotation.append(
-            dataset_id=dst_dataset.id,
-            ann=ann,
-            frame_to_pointcloud_ids=frame_to_pointcloud_ids,
-            key_id_map=key_id_map,
-        )
+                related_images.pop(src_pcde.id, None)
+                pbar.update()
+
+        # the annotation is downloaded only when all frames are uploaded
+        if len(frame_to_pointcloud_ids) > 0:
+            if interrupted:
+                remove_episode_annotation(dst_api, dst_dataset.id)
+            ann_json = src_api.pointcloud_episode.annotation.download(dataset_id=src_dataset.id)
+            copy_episode_annotation(dst_api, ann_json, meta, dst_dataset, frame_to_pointcloud_ids)
+    save_dataset_watermark(manifest, src_dataset, dst_dataset, src_pcdes)
+
+
+def sort_parents_first(datasets: List[DatasetInfo]) -> List[DatasetInfo]:
+    """Order nested datasets so that every parent goes before its children."""
+    ids = {dataset.id for dataset in datasets}
+    children = {}
+    roots = []
+    for dataset in datasets:
+        if dataset.parent_id is None or dataset.parent_id not in ids:
+            roots.append(dataset)
+        else:
+            children.setdefault(dataset.parent_id, []).append(dataset)
+    ordered = []
+    stack = list(reversed(roots))
+    while stack:
+        dataset = stack.pop()
+        ordered.append(dataset)
+        stack.extend(reversed(children.get(dataset.id, [])))
+    return ordered
+
+
+def log_progress(message: str, total: int, **kwargs) -> tqdm:
+    """Progress bar written to logs, used by datasets processed in parallel."""
+    return tqdm(desc=message, total=total, **kwargs)
 
 
 def get_ws_projects_map(ws_collapse):
@@ -902,6 +1976,7 @@ def import_workspaces(
     bucket_path: str = None,
     progress_it: Progress = None,
     is_autorestart: bool = False,
+    checkpoint: SyncCheckpoint = None,
 ):
     src_team = src_api.team.get_info_by_id(team_id)
     g.src_team_id = team_id
@@ -928,84 +2003,158 @@ def import_workspaces(
     dst_team = dst_api.team.get_info_by_name(src_team.name)
     if dst_team is None:
         dst_team = dst_api.team.create(src_team.name, description=src_team.description)
+    dst_index = DestinationIndex(dst_api, dst_team.id)
 
-    with progress_ws(
-        message=f"Synchronizing workspaces for Team: {src_team.name}", total=len(workspaces)
-    ) as pbar_ws:
-        for workspace in workspaces:
-            dst_workspace = dst_api.workspace.get_info_by_name(dst_team.id, workspace.name)
-            if dst_workspace is None:
-                dst_workspace = dst_api.workspace.create(
-                    dst_team.id, workspace.name, description=workspace.description
-                )
+    manifest = None
+    if g.use_sync_manifest:
+        try:
+            manifest = SyncManifest.open(dst_api, src_api.server_address, team_id)
+        except Exception:
+            sly.logger.warning(
+                "Failed to open sync manifest. Destination datasets will be listed.", exc_info=True
+            )
 
-            if is_import_all_ws:
-                projects = src_api.project.get_list(workspace.id)
-            elif isinstance(ws_collapse, dict) and is_autorestart:
-                projects = [
-                    src_api.project.get_info_by_id(project_id)
-                    for project_id in ws_collapse.get(str(workspace.id), [])
-                ]
-            else:
-                projects = [
-                    src_api.project.get_info_by_id(project_id)
-                    for project_id in ws_projects_map[workspace.id]
-                ]
-            with progress_pr(
-                message=f"Synchronizing projects for Workspace: {workspace.name}",
-                total=len(projects),
-            ) as pbar_pr:
-                for project in projects:
-                    temp_ws_scenario = ws_scenario_value
-                    dst_project = dst_api.project.get_info_by_name(dst_workspace.id, project.name)
-                    # if (
-                    #     dst_project is not None
-                    #     and dst_project.type != str(sly.ProjectType.IMAGES)
-                    #     and temp_ws_scenario == Scenario.CHECK
-                    # ):
-                    #     temp_ws_scenario = Scenario.REUPLOAD
-                    #     sly.logger.info(
-                    #         f"Changing synchronization scenario to 'reupload' for non-image projects '{dst_project.name}'."
-                    #     )
-
-                    if dst_project is None:
-                        dst_project = dst_api.project.create(
-                            dst_workspace.id,
-                            project.name,
-                            description=project.description,
-                            type=project.type,
-                        )
-                    elif dst_project is not None and temp_ws_scenario == Scenario.REUPLOAD:
-                        dst_api.project.remove(dst_project.id)
-                        dst_project = dst_api.project.create(
-                            dst_workspace.id,
-                            project.name,
-                            description=project.description,
-                            type=project.type,
-                        )
+    try:
+        with progress_ws(
+            message=f"Synchronizing workspaces for Team: {src_team.name}", total=len(workspaces)
+        ) as pbar_ws:
+            for workspace in workspaces:
+                dst_workspace = dst_index.get_workspace(workspace.name)
+                if dst_workspace is None:
+                    dst_workspace = dst_api.workspace.create(
+                        dst_team.id, workspace.name, description=workspace.description
+                    )
+                    dst_index.add_workspace(dst_workspace)
+                if manifest is not None:
+                    manifest.record(
+                        SyncManifest.Type.WORKSPACE,
+                        workspace.id,
+                        dst_workspace.id,
+                        dst_team.id,
+                        workspace.name,
+                        updated_at=workspace.updated_at,
+                    )
 
-                    elif dst_project is not None and temp_ws_scenario == Scenario.IGNORE:
-                        sly.logger.info(
-                            f"Project {project.name} already exists in destination Workspace. Skipping..."
-                        )
-                        pbar_pr.update()
-                        continue
+                if is_import_all_ws:
+                    projects = src_api.project.get_list(workspace.id)
+                elif isinstance(ws_collapse, dict) and is_autorestart:
+                    projects = [
+                        src_api.project.get_info_by_id(project_id)
+                        for project_id in ws_collapse.get(str(workspace.id), [])
+                    ]
+                else:
+                    projects = [
+                        src_api.project.get_info_by_id(project_id)
+                        for project_id in ws_projects_map[workspace.id]
+                    ]
+                with progress_pr(
+                    message=f"Synchronizing projects for Workspace: {workspace.name}",
+                    total=len(projects),
+                ) as pbar_pr:
+                    for project in projects:
+                        temp_ws_scenario = ws_scenario_value
+                        if checkpoint is not None and checkpoint.is_project_completed(project.id):
+                            sly.logger.info(
+                                f"Project {project.name} was synchronized before restart. Skipping..."
+                            )
+                            pbar_pr.update()
+                            continue
+                        if (
+                            checkpoint is not None
+                            and checkpoint.is_project_started(project.id)
+                            and temp_ws_scenario != Scenario.CHECK
+                        ):
+                            # project was already prepared before restart, its items are checked
+                            # instead of removing or skipping the project once again
+                            temp_ws_scenario = Scenario.CHECK
+                            sly.logger.info(
+                                f"Project {project.name} was partially synchronized before restart. "
+                                "Continuing with 'check' scenario."
+                            )
+                        dst_project = dst_index.get_project(dst_workspace.id, project.name)
+                        # if (
+                        #     dst_project is not None
+                        #     and dst_project.type != str(sly.ProjectType.IMAGES)
+                        #     and temp_ws_scenario == Scenario.CHECK
+                        # ):
+                        #     temp_ws_scenario = Scenario.REUPLOAD
+                        #     sly.logger.info(
+                        #         f"Changing synchronization scenario to 'reupload' for non-image projects '{dst_project.name}'."
+                        #     )
+
+                        if dst_project is None:
+                            dst_project = dst_api.project.create(
+                                dst_workspace.id,
+                                project.name,
+                                description=project.description,
+                                type=project.type,
+                            )
+                            dst_index.add_project(dst_project)
+                        elif dst_project is not None and temp_ws_scenario == Scenario.REUPLOAD:
+                            dst_api.project.remove(dst_project.id)
+                            dst_index.remove_project(dst_project)
+                            dst_project = dst_api.project.create(
+                                dst_workspace.id,
+                                project.name,
+                                description=project.description,
+                                type=project.type,
+                            )
+                            dst_index.add_project(dst_project)
 
-                    elif dst_project is not None and temp_ws_scenario == Scenario.CHECK:
-                        sly.logger.info(
-                            f"Project {project.name} already exists in destination Workspace. Checking..."
-                        )
+                        elif dst_project is not None and temp_ws_scenario == Scenario.IGNORE:
+                            sly.logger.info(
+                                f"Project {project.name} already exists in destination Workspace. Skipping..."
+                            )
+                            pbar_pr.update()
+                            continue
+
+                        elif dst_project is not None and temp_ws_scenario == Scenario.CHECK:
+                            watermark = None
+                            if manifest is not None and g.incremental_sync:
+                                watermark = manifest.get_watermark(
+                                    SyncManifest.Type.PROJECT, project.id
+                                )
+                            if (
+                                watermark is not None
+                                and watermark.dst_id == dst_project.id
+                                and watermark.updated_at == project.updated_at
+                                and watermark.items_count == project.items_count
+                            ):
+                                sly.logger.info(
+                                    f"Project {project.name} has not changed since the last sync. Skipping..."
+                                )
+                                pbar_pr.update()
+                                continue
+                            sly.logger.info(
+                                f"Project {project.name} already exists in destination Workspace. Checking..."
+                            )
 
-                    meta_json = src_api.project.get_meta(project.id)
-                    dst_api.project.update_meta(dst_project.id, meta_json)
-                    meta = sly.ProjectMeta.from_json(meta_json)
+                        if manifest is not None:
+                            manifest.record(
+                                SyncManifest.Type.PROJECT,
+                                project.id,
+                                dst_project.id,
+                                dst_workspace.id,
+                                project.name,
+                                updated_at=project.updated_at,
+                            )
 
-                    ds_mapping = {}
-                    datasets = src_api.dataset.get_list(project.id, recursive=True)
-                    with progress_ds(
-                        message=f"Synchronizing datasets for Project: {project.name}",
-                        total=len(datasets),
-                    ) as pbar_ds:
+                        if checkpoint is not None:
+                            checkpoint.project_started(project.id)
+
+                        meta_json = src_api.project.get_meta(project.id)
+                        dst_api.project.update_meta(dst_project.id, meta_json)
+                        meta = sly.ProjectMeta.from_json(meta_json)
+
+                        ds_mapping = {}
+                        datasets = sort_parents_first(
+                            src_api.dataset.get_list(project.id, recursive=True)
+                        )
+                        # Destination datasets are resolved in the main thread, parents before
+                        # children, so every nested dataset finds its parent in ds_mapping.
+                        dst_datasets = {}
+                        # watermarks of datasets created by this sync are not used
+                        created_datasets = set()
                         for src_dataset in datasets:
                             dst_parent = None
                             if src_dataset.parent_id is not None:
@@ -1016,7 +2165,7 @@ def import_workspaces(
                                         f"Parent dataset {src_dataset.parent_id} not found in mapping for dataset '{src_dataset.name}'."
                                         "Creating dataset at the top level of project."
                                     )
-                            dst_dataset = dst_api.dataset.get_info_by_name(
+                            dst_dataset = dst_index.get_dataset(
                                 dst_project.id,
                                 src_dataset.name,
                                 parent_id=dst_parent,
@@ -1029,26 +2178,135 @@ def import_workspaces(
                                     description=src_dataset.description,
                                     parent_id=dst_parent,
                                 )
+                                dst_index.add_dataset(dst_dataset)
+                                created_datasets.add(src_dataset.id)
 
                             ds_mapping[src_dataset.id] = dst_dataset.id
+                            if manifest is not None:
+                                manifest.record(
+                                    SyncManifest.Type.DATASET,
+                                    src_dataset.id,
+                                    dst_dataset.id,
+                                    dst_project.id,
+                                    src_dataset.name,
+                                    updated_at=src_dataset.updated_at,
+                                )
+                            dst_datasets[src_dataset.id] = dst_dataset
+
+                        process_func = process_type_map.get(project.type)
+                        datasets_to_process = datasets
+                        if checkpoint is not None:
+                            datasets_to_process = [
+                                src_dataset
+                                for src_dataset in datasets
+                                if not checkpoint.is_dataset_completed(src_dataset.id)
+                            ]
+                        workers = max(1, min(g.dataset_workers, len(datasets_to_process)))
+                        # Datasets processed in parallel can not share progress widgets,
+                        # their items progress is written to logs instead.
+                        items_progress = progress_items if workers == 1 else log_progress
+                        download_progress = progress_it if workers == 1 else log_progress
+                        scratch_dirs = queue.Queue()
+                        for worker_idx in range(workers):
+                            scratch_dirs.put(os.path.join("storage", f"worker_{worker_idx}"))
+
+                        incremental = (
+                            temp_ws_scenario == Scenario.CHECK
+                            and manifest is not None
+                            and g.incremental_sync
+                        )
 
-                            process_func = process_type_map.get(project.type)
-                            process_func(
-                                dst_api=dst_api,
-                                src_api=src_api,
-                                src_dataset=src_dataset,
-                                dst_dataset=dst_dataset,
-                                meta=meta,
-                                progress_items=progress_items,
-                                is_fast_mode=is_fast_mode,
-                                need_change_link=change_link_flag,
-                                bucket_path=bucket_path,
-                                scenario=temp_ws_scenario,
-                                progress_download_item=progress_it,
+                        def process_dataset(src_dataset: DatasetInfo):
+                            updated_after = None
+                            if incremental and src_dataset.id not in created_datasets:
+                                watermark = get_dataset_watermark(
+                                    manifest, src_dataset, dst_datasets[src_dataset.id]
+                                )
+                                if watermark is not None:
+                                    if is_dataset_unchanged(watermark, src_dataset):
+                                        sly.logger.info(
+                                            f"Dataset {src_dataset.name} has not changed since the last sync. Skipping..."
+                                        )
+                                        return
+                                    updated_after = watermark.watermark
+                            storage_dir = scratch_dirs.get()
+                            if checkpoint is not None:
+                                checkpoint.dataset_started(src_dataset.id)
+                            try:
+                                process_func(
+                                    dst_api=dst_api,
+                                    src_api=src_api,
+                                    src_dataset=src_dataset,
+                                    dst_dataset=dst_datasets[src_dataset.id],
+                                    meta=meta,
+                                    progress_items=items_progress,
+                                    is_fast_mode=is_fast_mode,
+                                    need_change_link=change_link_flag,
+                                    bucket_path=bucket_path,
+                                    scenario=temp_ws_scenario,
+                                    progress_download_item=download_progress,
+                                    storage_dir=storage_dir,
+                                    manifest=manifest,
+                                    checkpoint=checkpoint,
+                                    updated_after=updated_after,
+                                )
+                                if checkpoint is not None:
+                                    checkpoint.dataset_completed(src_dataset.id)
+                                log_memory_usage(f"Dataset {src_dataset.name} synchronized")
+                            finally:
+                                sly.fs.remove_dir(storage_dir)
+                                scratch_dirs.put(storage_dir)
+
+                        with progress_ds(
+                            message=f"Synchronizing datasets for Project: {project.name}",
+                            total=len(datasets),
+                        ) as pbar_ds:
+                            pbar_ds.update(len(datasets) - len(datasets_to_process))
+                            if workers == 1:
+                                for src_dataset in datasets_to_process:
+                                    process_dataset(src_dataset)
+                                    pbar_ds.update()
+                            else:
+                                with ThreadPoolExecutor(max_workers=workers) as executor:
+                                    futures = [
+                                        executor.submit(process_dataset, src_dataset)
+                                        for src_dataset in datasets_to_process
+                                    ]
+                                    try:
+                                        for future in as_completed(futures):
+                                            future.result()
+                                            pbar_ds.update()
+                                    except Exception:
+                                        for future in futures:
+                                            future.cancel()
+                                        raise
+                        if checkpoint is not None:
+                            checkpoint.project_completed(project.id)
+                        # datasets hold back their watermarks when some items must be retried,
+                        # then the project must not be skipped by the next sync either
+                        if manifest is not None and all(
+                            is_dataset_unchanged(
+                                get_dataset_watermark(
+                                    manifest, src_dataset, dst_datasets[src_dataset.id]
+                                ),
+                                src_dataset,
                             )
-                            pbar_ds.update()
-                    pbar_pr.update()
-            pbar_ws.update()
+                            for src_dataset in datasets
+                        ):
+                            manifest.set_watermark(
+                                SyncManifest.Type.PROJECT,
+                                project.id,
+                                project.updated_at,
+                                project.items_count,
+                                dst_id=dst_project.id,
+                            )
+                        pbar_pr.update()
+                pbar_ws.update()
+
+    finally:
+        if manifest is not None:
+            manifest.save_to_team_files(dst_api)
+            manifest.close()
 
     # progress_ws.hide()
     # progress_pr.hide()
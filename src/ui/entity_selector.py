@@ -548,6 +548,12 @@ def process_import():
         # import_progress_4.show()
         five_progress_visibility(True)
 
+        checkpoint = None
+        if g.autorestart:
+            # new synchronization starts from scratch, previous checkpoint is reset
+            checkpoint = ar.SyncCheckpoint(g.dst_api_task, g.task_id)
+            checkpoint.save()
+
         import_workspaces(
             g.dst_api,
             g.src_api,
@@ -563,6 +569,7 @@ def process_import():
             change_link_flag,
             bucket_path,
             import_progress_5,
+            checkpoint=checkpoint,
         )
 
         import_progress_2.hide(), import_progress_3.hide(), import_progress_4.hide(), import_progress_5.hide()
@@ -655,6 +662,7 @@ def process_import_from_autorestart(autorestart: ar.AutoRestartInfo):
             deploy_params["bucket_path"],
             import_progress_5,
             is_autorestart=True,
+            checkpoint=ar.SyncCheckpoint.load(g.dst_api_task, g.task_id),
         )
 
         import_progress_2.hide(), import_progress_3.hide(), import_progress_4.hide(), import_progress_5.hide()
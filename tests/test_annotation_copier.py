@@ -0,0 +1,260 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.annotation_copier import AnnotationCopier, UnsupportedAnnotation
+
+PROJECT_ID = 1
+DATASET_ID = 2
+CLASS_IDS = {"car": 11, "lung": 12}
+TAG_IDS = {"color": 21}
+
+
+class _Response:
+    def __init__(self, data):
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+class _TagApi:
+    def __init__(self, api: "FakeApi"):
+        self._api = api
+
+    def get_name_to_id_map(self, project_id):
+        return TAG_IDS
+
+    def _append_json(self, entity_id, tags_json):
+        self._api.entity_tags.append((entity_id, tags_json))
+
+    def append_to_objects_json(self, entity_id, tags_json):
+        self._api.object_tags.append((entity_id, tags_json))
+
+
+class _FigureApi:
+    def __init__(self, api: "FakeApi"):
+        self._api = api
+
+    def create_bulk(self, figures_json, entity_id=None, dataset_id=None, batch_size=200):
+        self._api.figures.append((entity_id, dataset_id, figures_json))
+        return self._api.take(len(figures_json))
+
+
+class FakeApi:
+    """Records the requests of AnnotationCopier, new objects and figures get IDs from 100."""
+
+    def __init__(self):
+        self.last_id = 99
+        self.objects = []
+        self.entity_tags = []
+        self.object_tags = []
+        self.figures = []
+        self.object_class = SimpleNamespace(get_name_to_id_map=lambda project_id: CLASS_IDS)
+        for name in ("video", "volume", "pointcloud", "pointcloud_episode"):
+            setattr(self, name, SimpleNamespace(tag=_TagApi(self), figure=_FigureApi(self)))
+
+    def take(self, count: int) -> list:
+        self.last_id += count
+        return list(range(self.last_id - count + 1, self.last_id + 1))
+
+    def post(self, method, data):
+        assert method == "annotation-objects.bulk.add"
+        self.objects.append(data)
+        return _Response([{"id": obj_id} for obj_id in self.take(len(data["annotationObjects"]))])
+
+    @property
+    def created(self) -> bool:
+        return any((self.objects, self.entity_tags, self.object_tags, self.figures))
+
+
+def make_object(obj_id: int, class_title: str = "car", tags: list = None) -> dict:
+    return {
+        "id": obj_id,
+        "key": f"key-{obj_id}",
+        "classId": 500,
+        "classTitle": class_title,
+        "tags": tags or [],
+    }
+
+
+def make_figure(figure_id: int, obj_id: int = None, obj_key: str = None) -> dict:
+    figure = {
+        "id": figure_id,
+        "key": f"figure-{figure_id}",
+        "geometryType": "rectangle",
+        "geometry": {"points": {"exterior": [[0, 0], [10, 10]]}},
+        "labelerLogin": "admin",
+    }
+    if obj_id is not None:
+        figure["objectId"] = obj_id
+    if obj_key is not None:
+        figure["objectKey"] = obj_key
+    return figure
+
+
+def make_tag(tag_id: int, value=None) -> dict:
+    return {"id": tag_id, "tagId": 900, "name": "color", "value": value, "labelerLogin": "admin"}
+
+
+def test_video_ids_are_remapped():
+    api = FakeApi()
+    ann_json = {
+        "tags": [make_tag(1, "red")],
+        "objects": [make_object(5, tags=[make_tag(2, "blue")]), make_object(6)],
+        "frames": [
+            {"index": 0, "figures": [make_figure(7, obj_id=5)]},
+            {"index": 3, "figures": [make_figure(8, obj_key="key-6")]},
+        ],
+    }
+    AnnotationCopier(api, PROJECT_ID).copy_video(ann_json, video_id=40, dataset_id=DATASET_ID)
+
+    assert api.entity_tags == [
+        (40, [{"name": "color", "value": "red", "labelerLogin": "admin", "tagId": 21}])
+    ]
+    assert api.objects == [
+        {
+            "datasetId": DATASET_ID,
+            "annotationObjects": [
+                {"classId": 11, "entityId": 40},
+                {"classId": 11, "entityId": 40},
+            ],
+        }
+    ]
+    # objects are created as 100 and 101
+    assert api.object_tags == [
+        (
+            40,
+            [
+                {
+                    "name": "color",
+                    "value": "blue",
+                    "labelerLogin": "admin",
+                    "tagId": 21,
+                    "objectId": 100,
+                }
+            ],
+        )
+    ]
+    [(entity_id, _, figures)] = api.figures
+    assert entity_id == 40
+    assert [(f["objectId"], f["meta"]) for f in figures] == [
+        (100, {"frame": 0}),
+        (101, {"frame": 3}),
+    ]
+    assert all("id" not in f and "key" not in f for f in figures)
+
+
+@pytest.mark.parametrize(
+    "ann_json",
+    [
+        {"objects": [make_object(5, class_title="person")], "frames": []},
+        {"objects": [make_object(5)], "frames": [], "tags": [{"name": "weather"}]},
+        {"objects": [make_object(5)], "frames": [{"index": 0, "figures": [make_figure(7, 6)]}]},
+        {"objects": [{"classTitle": "car"}], "frames": []},
+    ],
+    ids=["unknown class", "unknown tag", "unknown object", "object without id"],
+)
+def test_unsupported_video_creates_nothing(ann_json):
+    api = FakeApi()
+    with pytest.raises(UnsupportedAnnotation):
+        AnnotationCopier(api, PROJECT_ID).copy_video(ann_json, video_id=40, dataset_id=DATASET_ID)
+    assert not api.created
+
+
+def test_volume_spatial_figures_are_created_empty():
+    api = FakeApi()
+    ann_json = {
+        "objects": [make_object(5, class_title="lung")],
+        "planes": [
+            {
+                "name": "axial",
+                "normal": {"x": 0, "y": 0, "z": 1},
+                "slices": [{"index": 12, "figures": [make_figure(7, obj_id=5)]}],
+            }
+        ],
+        "spatialFigures": [{"id": 8, "objectId": 5, "geometryType": "mask_3d"}],
+    }
+    copier = AnnotationCopier(api, PROJECT_ID)
+    src_ids, dst_ids = copier.copy_volume(ann_json, volume_id=40, dataset_id=DATASET_ID)
+
+    [(_, _, slice_figures), (_, _, spatial_figures)] = api.figures
+    assert slice_figures[0]["objectId"] == 100
+    assert slice_figures[0]["meta"] == {
+        "sliceIndex": 12,
+        "planeName": "axial",
+        "normal": {"x": 0, "y": 0, "z": 1},
+    }
+    assert spatial_figures == [
+        {"objectId": 100, "geometryType": "mask_3d", "tool": "mask_3d", "entityId": 40}
+    ]
+    assert src_ids == [8]
+    assert dst_ids == [102]
+
+
+def test_volume_spatial_figure_of_other_type_is_unsupported():
+    api = FakeApi()
+    ann_json = {
+        "objects": [make_object(5, class_title="lung")],
+        "spatialFigures": [{"id": 8, "objectId": 5, "geometryType": "closed_surface_mesh"}],
+    }
+    with pytest.raises(UnsupportedAnnotation):
+        AnnotationCopier(api, PROJECT_ID).copy_volume(ann_json, volume_id=40, dataset_id=2)
+    assert not api.created
+
+
+def test_pointcloud_objects_belong_to_dataset():
+    api = FakeApi()
+    ann_json = {
+        "objects": [make_object(5)],
+        "figures": [make_figure(7, obj_id=5), make_figure(8, obj_key="key-5")],
+    }
+    AnnotationCopier(api, PROJECT_ID).copy_pointcloud(
+        ann_json, pointcloud_id=40, dataset_id=DATASET_ID
+    )
+
+    assert api.objects[0]["annotationObjects"] == [{"classId": 11}]
+    [(entity_id, _, figures)] = api.figures
+    assert entity_id == 40
+    assert [f["objectId"] for f in figures] == [100, 100]
+
+
+def test_episode_figures_of_unmapped_frames_are_skipped():
+    api = FakeApi()
+    ann_json = {
+        "objects": [make_object(5)],
+        "frames": [
+            {"index": 0, "figures": [make_figure(7, obj_id=5)]},
+            {"index": 1, "figures": []},
+            {"index": 2, "figures": [make_figure(8, obj_id=5)]},
+        ],
+        "tags": [],
+    }
+    copier = AnnotationCopier(api, PROJECT_ID)
+    copier.copy_episode(ann_json, dst_dataset_id=DATASET_ID, frame_to_pointcloud_ids={1: 41, 2: 42})
+
+    assert api.object_tags == []
+    assert api.objects[0]["annotationObjects"] == [{"classId": 11}]
+    [(_, dataset_id, figures)] = api.figures
+    assert dataset_id == DATASET_ID
+    assert [(f["objectId"], f["entityId"]) for f in figures] == [(100, 42)]
+    # processed frames are released
+    assert ann_json["frames"] == [None, None, None]
+
+
+def test_episode_without_mapped_frames_creates_nothing():
+    api = FakeApi()
+    ann_json = {
+        "objects": [make_object(5)],
+        "frames": [{"index": 0, "figures": [make_figure(7, obj_id=5)]}],
+    }
+    AnnotationCopier(api, PROJECT_ID).copy_episode(ann_json, DATASET_ID, {1: 41})
+    assert not api.created
+
+
+def test_episode_tags_are_unsupported():
+    api = FakeApi()
+    ann_json = {"objects": [], "frames": [], "tags": [make_tag(1)]}
+    with pytest.raises(UnsupportedAnnotation):
+        AnnotationCopier(api, PROJECT_ID).copy_episode(ann_json, DATASET_ID, {0: 40})
+    assert not api.created
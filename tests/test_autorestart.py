@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+from src.autorestart import SyncCheckpoint
+
+TASK_ID = 7
+
+
+class FakeTaskApi:
+    """Keeps task fields in memory."""
+
+    def __init__(self, fields: dict = None, fail: bool = False):
+        self.fields = fields or {}
+        self.fail = fail
+        self.saves = 0
+
+    def get_fields(self, task_id, fields):
+        assert task_id == TASK_ID
+        return {field: self.fields[field] for field in fields if field in self.fields}
+
+    def set_fields(self, task_id, fields):
+        if self.fail:
+            raise ConnectionError("server is not available")
+        for field in fields:
+            self.fields[field["field"]] = field["payload"]
+        self.saves += 1
+
+
+def make_api(**kwargs) -> SimpleNamespace:
+    return SimpleNamespace(task=FakeTaskApi(**kwargs))
+
+
+def test_restarted_task_continues_from_checkpoint():
+    api = make_api()
+    checkpoint = SyncCheckpoint.load(api, TASK_ID)
+    checkpoint.project_started(1)
+    checkpoint.dataset_started(10)
+    checkpoint.dataset_completed(10)
+    checkpoint.dataset_started(11)
+    checkpoint.items_done(11, 105)
+    checkpoint.dataset_started(12)
+    checkpoint.save()
+
+    restored = SyncCheckpoint.load(api, TASK_ID)
+    assert restored.is_project_started(1)
+    assert not restored.is_project_completed(1)
+    assert restored.is_dataset_completed(10)
+    assert restored.get_last_item_id(11) == 105
+    assert restored.get_last_item_id(12) is None
+
+
+def test_items_after_checkpoint_are_interrupted():
+    api = make_api()
+    checkpoint = SyncCheckpoint.load(api, TASK_ID)
+    checkpoint.dataset_started(11)
+    checkpoint.items_done(11, 105)
+    checkpoint.dataset_started(12)
+    checkpoint.save()
+
+    restored = SyncCheckpoint.load(api, TASK_ID)
+    assert restored.is_dataset_interrupted(11)
+    assert not restored.is_item_interrupted(11, 105)
+    assert restored.is_item_interrupted(11, 106)
+    # no item of the dataset was completed
+    assert restored.is_item_interrupted(12, 1)
+    # datasets started by the current task are not interrupted
+    restored.dataset_started(13)
+    assert not restored.is_dataset_interrupted(13)
+    assert not restored.is_item_interrupted(13, 1)
+
+
+def test_item_progress_is_saved_once_per_interval():
+    api = make_api()
+    checkpoint = SyncCheckpoint(api, TASK_ID, save_interval=3600)
+    checkpoint.dataset_started(11)
+    saves = api.task.saves
+    checkpoint.items_done(11, 1)
+    checkpoint.items_done(11, 2)
+    assert api.task.saves == saves
+    checkpoint.dataset_completed(11)
+    assert api.task.saves == saves + 1
+
+
+def test_failed_save_is_not_raised():
+    api = make_api(fail=True)
+    checkpoint = SyncCheckpoint.load(api, TASK_ID)
+    checkpoint.project_completed(1)
+    assert checkpoint.is_project_completed(1)
+    assert api.task.fields == {}
@@ -0,0 +1,67 @@
+import requests
+
+from src.batching import AdaptiveBatcher, is_overload_error
+
+
+def sizes(batches) -> list:
+    return [len(batch) for batch in batches]
+
+
+def test_batches_are_limited_by_count_and_bytes():
+    items = [10, 10, 10, 50, 10, 10, 10, 10]
+    batcher = AdaptiveBatcher(items, lambda size: size, initial_batch_size=3, max_batch_bytes=55)
+    assert list(batcher) == [[10, 10, 10], [50], [10, 10, 10], [10]]
+
+
+def test_unknown_sizes_are_not_counted():
+    batcher = AdaptiveBatcher(range(5), lambda item: None, initial_batch_size=2, max_batch_bytes=1)
+    assert sizes(batcher) == [2, 2, 1]
+
+
+def test_report_changes_size_of_next_batches():
+    batcher = AdaptiveBatcher(range(100), lambda item: 1, initial_batch_size=10)
+    result = []
+    for batch in batcher:
+        result.append(len(batch))
+        if len(result) == 1:
+            batcher.report(len(batch), len(batch), duration=1.0)
+    assert result[:2] == [10, 15]
+
+
+def test_batch_grows_while_throughput_rises():
+    batcher = AdaptiveBatcher([], lambda item: 1, initial_batch_size=10, max_batch_size=20)
+    batcher.report(10, 1000, duration=1.0)
+    assert batcher.batch_size == 15
+    batcher.report(15, 2000, duration=1.0)
+    assert batcher.batch_size == 20
+    # same throughput
+    batcher.report(20, 2000, duration=1.0)
+    assert batcher.batch_size == 20
+
+
+def test_batch_shrinks_when_throughput_drops_or_latency_is_high():
+    batcher = AdaptiveBatcher([], lambda item: 1, initial_batch_size=100, target_latency=10.0)
+    batcher.report(100, 1000, duration=1.0)
+    assert batcher.batch_size == 150
+    batcher.report(150, 1000, duration=2.0)
+    assert batcher.batch_size == 112
+    batcher.report(112, 1000, duration=11.0)
+    assert batcher.batch_size == 84
+
+
+def test_errors_halve_batch_size_down_to_minimum():
+    batcher = AdaptiveBatcher([], lambda item: 1, initial_batch_size=8, min_batch_size=3)
+    batcher.report_error(requests.exceptions.Timeout())
+    assert batcher.batch_size == 4
+    batcher.report_error(requests.exceptions.Timeout())
+    assert batcher.batch_size == 3
+
+
+def test_overload_errors():
+    response = requests.Response()
+    response.status_code = 503
+    assert is_overload_error(requests.exceptions.HTTPError(response=response))
+    assert is_overload_error(requests.exceptions.ConnectionError())
+    response.status_code = 404
+    assert not is_overload_error(requests.exceptions.HTTPError(response=response))
+    assert not is_overload_error(ValueError())
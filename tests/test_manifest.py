@@ -0,0 +1,92 @@
+import sqlite3
+
+import pytest
+
+from src.manifest import ManifestItem, SyncManifest, Watermark, get_ann_fingerprint
+
+IMAGES = "images"
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = SyncManifest(str(tmp_path / "manifest" / "team.db"))
+    yield manifest
+    manifest.close()
+
+
+def test_items_are_grouped_by_destination_dataset(manifest):
+    manifest.record_many(
+        IMAGES,
+        100,
+        [
+            (1, 11, "a.jpg", "hash-a", "2024-01-01", "ann-a", "meta-a"),
+            (2, 12, "b.jpg", "hash-b", "2024-01-02", None, None),
+        ],
+    )
+    manifest.record(IMAGES, 3, 13, dst_parent_id=200, name="c.jpg")
+
+    assert manifest.get(IMAGES, 1) == ManifestItem(
+        11, "a.jpg", "hash-a", "2024-01-01", 1, "ann-a", "meta-a"
+    )
+    assert sorted(item.name for item in manifest.get_children(IMAGES, 100)) == ["a.jpg", "b.jpg"]
+    assert manifest.get(IMAGES, 4) is None
+    assert manifest.get(SyncManifest.Type.DATASET, 1) is None
+
+
+def test_unknown_fingerprints_keep_stored_ones(manifest):
+    manifest.record(IMAGES, 1, 11, 100, "a.jpg", "hash-a", "2024-01-01", "ann-a", "meta-a")
+    manifest.record(IMAGES, 1, 21, 200, "a.jpg", "hash-b", "2024-02-01")
+    item = manifest.get(IMAGES, 1)
+    assert (item.id, item.hash, item.updated_at) == (21, "hash-b", "2024-02-01")
+    assert (item.ann_fingerprint, item.meta_fingerprint) == ("ann-a", "meta-a")
+    assert manifest.get_children(IMAGES, 100) == []
+
+    manifest.record(IMAGES, 1, 21, 200, "a.jpg", "hash-b", "2024-02-01", "ann-b", "meta-b")
+    item = manifest.get(IMAGES, 1)
+    assert (item.ann_fingerprint, item.meta_fingerprint) == ("ann-b", "meta-b")
+
+
+def test_watermarks(manifest):
+    assert manifest.get_watermark(SyncManifest.Type.PROJECT, 1) is None
+    manifest.set_watermark(SyncManifest.Type.PROJECT, 1, "2024-01-01", 10, "2024-01-02", dst_id=5)
+    manifest.set_watermark(SyncManifest.Type.PROJECT, 1, "2024-03-01", 12)
+    assert manifest.get_watermark(SyncManifest.Type.PROJECT, 1) == Watermark(
+        "2024-03-01", 12, None, None
+    )
+
+
+def test_manifest_of_older_version_is_migrated(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE entities (type TEXT NOT NULL, src_id INTEGER NOT NULL, "
+        "dst_id INTEGER NOT NULL, dst_parent_id INTEGER, name TEXT, hash TEXT, "
+        "updated_at TEXT, ann_fingerprint TEXT, synced_at TEXT, PRIMARY KEY (type, src_id))"
+    )
+    conn.execute(
+        "CREATE TABLE watermarks (type TEXT NOT NULL, src_id INTEGER NOT NULL, "
+        "updated_at TEXT, items_count INTEGER, watermark TEXT, PRIMARY KEY (type, src_id))"
+    )
+    conn.execute(
+        "INSERT INTO entities VALUES ('images', 1, 11, 100, 'a.jpg', 'h', 'u', 'ann', 's')"
+    )
+    conn.execute("INSERT INTO watermarks VALUES ('project', 1, 'u', 10, 'w')")
+    conn.commit()
+    conn.close()
+
+    manifest = SyncManifest(path)
+    try:
+        assert manifest.get(IMAGES, 1) == ManifestItem(11, "a.jpg", "h", "u", 1, "ann", None)
+        assert manifest.get_watermark("project", 1) == Watermark("u", 10, "w", None)
+    finally:
+        manifest.close()
+
+
+def test_ann_fingerprint_ignores_key_order():
+    assert get_ann_fingerprint({"a": 1, "b": [1, 2]}) == get_ann_fingerprint({"b": [1, 2], "a": 1})
+    assert get_ann_fingerprint({"a": 1}) != get_ann_fingerprint({"a": 2})
+
+
+def test_file_name_is_safe():
+    name = SyncManifest.get_file_name("https://app.supervisely.com:8080", 3)
+    assert name == "app.supervisely.com_8080_team_3.db"
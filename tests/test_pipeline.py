@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+
+import src.pipeline as pipeline
+from src.pipeline import run_pipeline
+
+
+@pytest.fixture(autouse=True)
+def short_poll(monkeypatch):
+    monkeypatch.setattr(pipeline, "_POLL_TIMEOUT", 0.01)
+
+
+def test_items_pass_all_stages_in_order():
+    done = []
+    run_pipeline(range(10), [lambda x: x * 2, lambda x: x + 1, done.append], max_in_flight=3)
+    assert done == [x * 2 + 1 for x in range(10)]
+
+
+def test_in_flight_items_are_bounded():
+    lock = threading.Lock()
+    state = {"in_flight": 0, "max": 0}
+
+    def items():
+        for idx in range(20):
+            with lock:
+                state["in_flight"] += 1
+                state["max"] = max(state["max"], state["in_flight"])
+            yield idx
+
+    def finish(item):
+        with lock:
+            state["in_flight"] -= 1
+
+    run_pipeline(items(), [lambda x: x, lambda x: x, finish], max_in_flight=2)
+    assert state["in_flight"] == 0
+    assert state["max"] <= 2
+
+
+def test_stage_error_stops_pipeline():
+    done = []
+
+    def fail(item):
+        if item == 3:
+            raise RuntimeError("upload failed")
+        return item
+
+    with pytest.raises(RuntimeError, match="upload failed"):
+        run_pipeline(range(100), [lambda x: x, fail, done.append], max_in_flight=2)
+    # items queued after the failed one are dropped, the ones before it may be too
+    assert done == [0, 1, 2][: len(done)]
+
+
+def test_items_iterator_error_is_raised():
+    done = []
+
+    def items():
+        yield 1
+        yield 2
+        raise ValueError("listing failed")
+
+    with pytest.raises(ValueError, match="listing failed"):
+        run_pipeline(items(), [done.append])
+    assert done == [1, 2][: len(done)]
+
+
+def test_max_in_flight_must_be_positive():
+    with pytest.raises(ValueError):
+        run_pipeline([1], [lambda x: x], max_in_flight=0)
@@ -0,0 +1,118 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import src.ranged_download as ranged_download
+from src.ranged_download import download_url_resumable
+
+DATA = os.urandom(3 * 1024 * 1024 + 123)
+
+
+class DroppingHandler(BaseHTTPRequestHandler):
+    """
+    Serves DATA to POST requests. The first `drops` responses are cut off after `drop_after`
+    bytes of the body. Range requests are answered with 206 if `honour_range` is set.
+    """
+
+    honour_range = True
+    drops = 1
+    drop_after = 1024 * 1024
+    requests = []
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        range_header = self.headers.get("Range")
+        self.requests.append(range_header)
+        offset = 0
+        if range_header is not None and self.honour_range:
+            offset = int(range_header[len("bytes=") :].rstrip("-"))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {offset}-{len(DATA) - 1}/{len(DATA)}")
+        else:
+            self.send_response(200)
+        body = DATA[offset:]
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if len(self.requests) <= self.drops:
+            self.wfile.write(body[: self.drop_after])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server(request):
+    handler = type(
+        "Handler", (DroppingHandler,), {"requests": [], **getattr(request, "param", {})}
+    )
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/download", handler
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(ranged_download.time, "sleep", lambda seconds: None)
+
+
+def download(url: str, tmp_path, retries: int = ranged_download.RETRIES) -> str:
+    path = str(tmp_path / "result.bin")
+    download_url_resumable(
+        url,
+        path,
+        str(tmp_path / "partial" / "result.bin.part"),
+        key="test",
+        json_data={"id": 1},
+        retries=retries,
+    )
+    return path
+
+
+def read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_resumes_with_range(server, tmp_path):
+    url, handler = server
+    path = download(url, tmp_path)
+    assert read(path) == DATA
+    assert handler.requests == [None, f"bytes={handler.drop_after}-"]
+    assert not os.path.exists(tmp_path / "partial" / "result.bin.part.json")
+
+
+@pytest.mark.parametrize("server", [{"honour_range": False}], indirect=True)
+def test_starts_over_if_range_is_ignored(server, tmp_path):
+    url, handler = server
+    path = download(url, tmp_path)
+    assert read(path) == DATA
+    assert handler.requests == [None, f"bytes={handler.drop_after}-"]
+
+
+@pytest.mark.parametrize("server", [{"drops": 3}], indirect=True)
+def test_continues_partial_file_after_restart(server, tmp_path):
+    url, handler = server
+    with pytest.raises(Exception):
+        download(url, tmp_path, retries=1)
+    part_path = tmp_path / "partial" / "result.bin.part"
+    assert os.path.getsize(part_path) == handler.drop_after
+
+    # the next task continues from the saved offset
+    with pytest.raises(Exception):
+        download(url, tmp_path, retries=1)
+    assert os.path.getsize(part_path) == 2 * handler.drop_after
+    path = download(url, tmp_path)
+    assert read(path) == DATA
+    assert handler.requests[1:] == [
+        f"bytes={handler.drop_after}-",
+        f"bytes={2 * handler.drop_after}-",
+        f"bytes={3 * handler.drop_after}-",
+    ]